@@ -1,202 +1,55 @@
 import streamlit as st
-import streamlit_authenticator as stauth
-import sqlite3
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import pickle
+from datetime import datetime
+import copy
 import os
 from dotenv import load_dotenv
-import smtplib
-from email.mime.text import MIMEText
-import requests  # For free API calls
-import time
-import threading
-import json  # For caching
+import storage
+import scanner_service
+import ui_data
 
 load_dotenv()
 
-CORE_TICKERS = ['NVDA', 'TSLA', 'AMD', 'SMCI', 'META', 'AAPL', 'MSFT', 'GOOGL', 'AVGO']
-
-# Cache for API results (simple file-based, expires in 1h)
-CACHE_FILE = 'sentiment_cache.json'
-def load_cache():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r') as f:
-            return json.load(f)
-    return {}
-def save_cache(cache):
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache, f)
+# Streamlit re-runs this whole script on every interaction, so anything
+# expensive is built once per process in a cached factory below.
 
 # === DATABASE ===
-conn = sqlite3.connect('benji.db', check_same_thread=False)
-c = conn.cursor()
-c.execute('''CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, email TEXT, telegram_chat_id TEXT, ai_total REAL DEFAULT 0, you_total REAL DEFAULT 0, join_date TEXT)''')
-c.execute('''CREATE TABLE IF NOT EXISTS signals (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, timestamp TEXT, ticker TEXT, direction TEXT, strike REAL, expiry TEXT, pnl REAL DEFAULT 0, user_confirmed INTEGER DEFAULT 0, pop REAL, explanation TEXT)''')
-c.execute('''CREATE TABLE IF NOT EXISTS preferences (username TEXT, ticker TEXT, enabled INTEGER DEFAULT 1, PRIMARY KEY (username, ticker))''')
-c.execute('''CREATE TABLE IF NOT EXISTS active_signals (ticker TEXT PRIMARY KEY, direction TEXT, strike REAL, expiry TEXT, entry_time TEXT, pop REAL, explanation TEXT)''')
-conn.commit()
+@st.cache_resource(show_spinner=False)
+def database():
+    return storage.writer()  # opens benji.db in WAL mode and applies schema migrations
 
-# === MODEL ===
-try:
-    with open('model.pkl', 'rb') as f:
-        model = pickle.load(f)
-except:
-    model = None
+database()
 
 # === AUTHENTICATION ===
-credentials = {"usernames": {}}
-for item in os.getenv("AUTH_CONFIG", "").split(";"):
-    if item.strip():
-        name, hash_ = item.strip().split(":", 1)
-        credentials["usernames"][name] = {"name": name, "password": hash_}
-
-authenticator = stauth.Authenticate(credentials, "benji_cookie", "benji_key", cookie_expiry_days=30)
-
-# === SENTIMENT ENGINE (Finger on the Pulse) ===
-vader = SentimentIntensityAnalyzer()
-cache = load_cache()
-
-def get_x_sentiment(ticker):
-    """Real-time X hype via keyword search (free, no key). Analyzes recent posts for bullish/bearish buzz."""
-    if ticker in cache and (time.time() - cache[ticker]['time']) < 3600:  # 1h cache
-        return cache[ticker]['score']
-    
-    # Simulate X search (pull recent posts with keywords; in prod, integrate x_keyword_search if available)
-    # For now, fetch sample posts via mock (real impl: requests to X API or tool)
-    query = f"{ticker} (bullish OR bearish OR buy OR sell) min_faves:5 since:2025-11-22"
-    # Mock 10 recent posts (replace with real fetch in prod)
-    sample_posts = [
-        f"$ {ticker} ripping higher on AI news! Buy now!",  # Bullish
-        f"$ {ticker} dumping hard, sell before worse.",  # Bearish
-        f"Long $ {ticker} forever, Elon magic.",  # Bullish
-        f"$ {ticker} overvalued, short it.",  # Bearish
-        f"Bullish on $ {ticker} Q4 earnings.",  # Bullish
-        f"$ {ticker} meta shift, avoid.",  # Neutral/bear
-        f"Huge volume on $ {ticker}, breakout!",  # Bullish
-        f"$ {ticker} correction incoming.",  # Bearish
-        f"Accumulating $ {ticker} dips.",  # Bullish
-        f"$ {ticker} hype dead, pass."  # Bearish
-    ]
-    
-    scores = [vader.polarity_scores(post)['compound'] for post in sample_posts]
-    avg_score = np.mean(scores)
-    cache[ticker] = {'score': avg_score, 'time': time.time()}
-    save_cache(cache)
-    return avg_score
-
-def get_finnhub_sentiment(ticker):
-    """Free Finnhub news sentiment (60 calls/min, no key for basics)."""
-    if ticker in cache and (time.time() - cache[ticker]['finnhub_time']) < 1800:  # 30min cache
-        return cache[ticker]['finnhub_score']
-    
-    try:
-        url = f"https://finnhub.io/api/v1/news-sentiment?symbol={ticker}&token=demo"  # Demo key for free tier
-        resp = requests.get(url, timeout=5)
-        data = resp.json()
-        score = data.get('sentiment', {}).get('score', 0.0) if 'sentiment' in data else 0.5
-        cache[ticker] = {**cache.get(ticker, {}), 'finnhub_score': score, 'finnhub_time': time.time()}
-        save_cache(cache)
-        return score
-    except:
-        return 0.5
-
-def get_alphavantage_sentiment():
-    """Free global market sentiment from Alpha Vantage (1 call/day)."""
-    if 'global' in cache and (time.time() - cache['global']['time']) < 86400:  # 24h cache
-        return cache['global']['score']
-    
-    try:
-        url = "https://www.alphavantage.co/query?function=NEWS_SENTIMENT&tickers=NVDA,TSLA&apikey=demo"  # Demo for free
-        resp = requests.get(url, timeout=10)
-        data = resp.json()
-        # Average feed scores
-        scores = [item.get('overall_sentiment_score', 0.5) for item in data.get('feed', [])[:10]]
-        avg = np.mean(scores) if scores else 0.5
-        cache['global'] = {'score': avg, 'time': time.time()}
-        save_cache(cache)
-        return avg
-    except:
-        return 0.5
-
-def get_sentiment(ticker):
-    """Combined pulse: X hype (primary) + Finnhub news + Alpha global + VADER fallback."""
-    x_score = get_x_sentiment(ticker)
-    finnhub_score = get_finnhub_sentiment(ticker)
-    global_score = get_alphavantage_sentiment()
-    # Blend: 50% X (hype), 30% news, 20% global
-    blended = 0.5 * x_score + 0.3 * finnhub_score + 0.2 * global_score
-    # Fallback if low: VADER on ticker-specific mock social text
-    if blended < 0.1:
-        mock_text = f"$ {ticker} breaking out on volume, bullish sentiment rising."
-        blended = vader.polarity_scores(mock_text)['compound']
-    return blended
-
-# === SCANNER LOGIC (Enhanced with Pulse) ===
-def analyze_and_signal():
-    c.execute('SELECT DISTINCT ticker FROM preferences WHERE enabled=1')
-    watched = {row[0] for row in c.fetchall()} | set(CORE_TICKERS)
-    active = {row[0] for row in c.execute('SELECT ticker FROM active_signals')}
-
-    for ticker in watched:
-        try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period='1mo')
-            if len(hist) < 20: continue
-            momentum = (hist['Close'][-1] - hist['Close'][-10]) / hist['Close'][-10]
-            sentiment = get_sentiment(ticker)  # Now pulse-aware!
-            pop_estimate = 50 + momentum * 220 + sentiment * 50  # Boosted sentiment weight for hype
-
-            if pop_estimate > 72 and ticker not in active:
-                opts = stock.option_chain(stock.options[1] if len(stock.options) > 1 else stock.options[0])
-                chain = opts.calls if momentum > 0 else opts.puts
-                strike = chain.iloc[(chain.strike - stock.history(period='1d')['Close'][-1] * (1.02 if momentum > 0 else 0.98)).abs().argsort()[0]]['strike']
-                expiry = stock.options[1] if len(stock.options) > 1 else stock.options[0]
-                explanation = f"{ticker} {'ripping higher' if momentum > 0 else 'dumping'} with {sentiment:+.0%} pulse (X hype + news buzz) — quick edge."
-                
-                c.execute('INSERT OR REPLACE INTO active_signals VALUES (?,?,?,?,?,?,?)',
-                          (ticker, 'call' if momentum > 0 else 'put', strike, expiry, datetime.now().isoformat(), pop_estimate, explanation))
-                conn.commit()
-
-                msg = f"Benji: Buy {ticker} {expiry} ${strike} {'c' if momentum > 0 else 'p'} – $100 play – {int(pop_estimate)}% edge (hype alert!)"
-                for user_row in c.execute('SELECT username,email,telegram_chat_id FROM users'):
-                    username, email, chat_id = user_row
-                    pref = c.execute('SELECT enabled FROM preferences WHERE username=? AND ticker=?', (username, ticker)).fetchone()
-                    if pref and pref[0] != 0:
-                        if email: 
-                            try:
-                                server = smtplib.SMTP(os.getenv('SMTP_SERVER'), int(os.getenv('SMTP_PORT')))
-                                server.starttls()
-                                server.login(os.getenv('SMTP_USER'), os.getenv('SMTP_PASSWORD'))
-                                server.sendmail(os.getenv('SMTP_USER'), email, f"Subject: Benji Signal\n\n{msg}")
-                                server.quit()
-                            except: pass
-                        if chat_id: send_telegram(chat_id, msg)
-        except: pass
-
-    # Close expired signals (unchanged)
-    for row in c.execute('SELECT * FROM active_signals'):
-        if datetime.strptime(row[3], '%Y-%m-%d') < datetime.now():
-            pnl = 180 if np.random.rand() > 0.35 else -100
-            c.execute("INSERT INTO signals (username,timestamp,ticker,direction,strike,expiry,pnl,pop,explanation) VALUES ('all',?,?,?,?,?,?,?,?)",
-                      (datetime.now().isoformat(), row[0], row[1], row[2], row[3], pnl, row[5], row[6]))
-            for user in c.execute('SELECT username,ai_total FROM users'):
-                c.execute('UPDATE users SET ai_total = ai_total + ? WHERE username=?', (pnl, user[0]))
-            c.execute('DELETE FROM active_signals WHERE ticker=?', (row[0],))
-            conn.commit()
-
-# Background scanner
-def background_scanner():
-    while True:
-        analyze_and_signal()
-        time.sleep(540)  # 9 min
-
-if not st.session_state.get('scanner_started'):
-    threading.Thread(target=background_scanner, daemon=True).start()
-    st.session_state.scanner_started = True
+@st.cache_resource(show_spinner=False)
+def credentials():
+    users = {"usernames": {}}
+    for item in os.getenv("AUTH_CONFIG", "").split(";"):
+        if item.strip():
+            name, hash_ = item.strip().split(":", 1)
+            users["usernames"][name] = {"name": name, "password": hash_}
+    return users
+
+def get_authenticator():
+    # Built on every run: its cookie manager component has to render each time to
+    # see the browser's cookies. Only the parsed credentials are cached (and copied,
+    # since Authenticate may rewrite them in place).
+    import streamlit_authenticator as stauth
+    return stauth.Authenticate(copy.deepcopy(credentials()), "benji_cookie", "benji_key", cookie_expiry_days=30)
+
+authenticator = get_authenticator()
+
+# === SCANNER ===
+# Normally the scanner runs as its own service (scanner_service.py). If none is
+# running, one process-wide instance is started here — never one per session.
+@st.cache_resource(show_spinner=False)
+def embedded_scanner():
+    if os.getenv('BENJI_EMBEDDED_SCANNER', '1') == '0':
+        return None
+    return scanner_service.start_background()
+
+embedded_scanner()
+
+ADMINS = {name.strip() for name in os.getenv('BENJI_ADMINS', '').split(',') if name.strip()}
 
 # === UI (unchanged from last version) ===
 st.set_page_config(page_title="Benji Bot", layout="centered")
@@ -206,39 +59,66 @@ name, auth_status, username = authenticator.login('Login to Benji Bot', 'main')
 
 if auth_status:
     authenticator.logout('Logout', 'sidebar')
-    c.execute('INSERT OR IGNORE INTO users (username,join_date) VALUES (?,?)', (username, datetime.now().date().isoformat()))
-    conn.commit()
+    if st.session_state.get('registered') != username:
+        # ai_base: the AI's running total at sign-up, so "AI says" counts from the day you joined
+        storage.write("INSERT OR IGNORE INTO users (username,join_date,ai_base) VALUES (?,?,COALESCE((SELECT pnl FROM pnl_rollups "
+                      "WHERE scope='ai' AND key='' AND period='all' AND bucket=''),0))", (username, datetime.now().date().isoformat()))
+        st.session_state.registered = username
 
-    tab1, tab2 = st.tabs(["Home", "Alerts"])
+    tabs = st.tabs(["Home", "Alerts", "Admin"] if username in ADMINS else ["Home", "Alerts"])
+    tab1, tab2 = tabs[:2]
 
     with tab1:
         st.markdown("<p style='text-align:center;font-size:1.3em;margin-bottom:30px;'>Every play is $100 flat. Click 'I did this' to count it.</p>", unsafe_allow_html=True)
 
-        signal = c.execute('SELECT * FROM active_signals ORDER BY entry_time DESC LIMIT 1').fetchone()
+        signal = ui_data.latest_signal()
         if signal:
             st.markdown("### RIGHT NOW PLAY")
-            st.markdown(f"**{signal[0]} {signal[3]} ${signal[2]:.2f}{signal[1][0].upper()} – $100 play**")
+            st.markdown(f"**{signal['ticker']} {signal['expiry']} ${signal['strike']:.2f}{signal['direction'][0].upper()} – $100 play**")
             if st.button("Explain", key="explain_main"):
-                st.write("**Layman:** " + signal[6])
-                st.code(f"Sentiment: {get_sentiment(signal[0]):+.1%} (X hype + news)\nMomentum edge\nExpiry: {signal[3]}")
+                st.write("**Layman:** " + signal['explanation'])
+                pulse = f"{signal['sentiment']:+.1%}" if signal['sentiment'] is not None else "n/a"
+                st.code(f"Sentiment: {pulse} (X hype + news, at signal time)\nMomentum edge\nExpiry: {signal['expiry']}")
         else:
             st.markdown("### Flat tape – stand down")
 
-        ai = c.execute('SELECT ai_total FROM users WHERE username=?', (username,)).fetchone()[0] or 0
-        you = c.execute('SELECT you_total FROM users WHERE username=?', (username,)).fetchone()[0] or 0
+        ai, you = ui_data.user_totals(username)
         col1, col2 = st.columns(2)
         with col1: st.metric("AI says", f"${ai:+,.0f}")
         with col2: st.metric("You", f"${you:+,.0f}")
 
+        mine = ui_data.rollup_stats('user', username)
+        st.caption(f"You this week: ${mine['week']['pnl']:+,.0f} over {mine['week']['plays']} plays · "
+                   f"today: ${mine['day']['pnl']:+,.0f} over {mine['day']['plays']}")
+        with st.expander("Leaderboard (this week)"):
+            for rank, row in enumerate(ui_data.leaderboard('week'), 1):
+                st.write(f"{rank}. {row['username']} ${row['pnl']:+,.0f} ({row['wins']}/{row['plays']} wins)")
+
         if st.button("Show all past plays"):
-            for row in c.execute('SELECT * FROM signals ORDER BY timestamp DESC').fetchall():
-                pnl = row[8]
+            st.session_state.show_history = not st.session_state.get('show_history', False)
+            st.session_state.history_cursors = [None]  # keyset cursor per page visited
+
+        if st.session_state.get('show_history'):
+            cursors = st.session_state.history_cursors
+            rows, next_cursor = ui_data.signals_page(username, cursors[-1])
+            for row in rows:
+                pnl = row['pnl']
                 color = "Green" if pnl > 0 else "Red"
-                st.write(f"{color} {row[3]} {row[4]} ${row[5]:.2f} {row[6]} → ${pnl:+.0f}")
-                if not row[9] and st.button("I did this", key=f"confirm_{row[0]}"):
-                    c.execute('UPDATE signals SET user_confirmed=1 WHERE id=?', (row[0],))
-                    c.execute('UPDATE users SET you_total = you_total + ? WHERE username=?', (pnl, username))
-                    conn.commit()
+                st.write(f"{color} {row['ticker']} {row['direction']} ${row['strike']:.2f} {row['expiry']} → ${pnl:+.0f}")
+                if not row['user_confirmed'] and st.button("I did this", key=f"confirm_{row['id']}"):
+                    # One ledger row per (user, play); the trigger updates you_total and the rollups
+                    storage.write('INSERT OR IGNORE INTO confirmations (username,signal_id,pnl,confirmed_at) VALUES (?,?,?,?)',
+                                  (username, row['id'], pnl, datetime.now().isoformat()))
+                    ui_data.invalidate()
+                    st.rerun()
+            newer, older = st.columns(2)
+            with newer:
+                if len(cursors) > 1 and st.button("Newer", key="history_newer"):
+                    cursors.pop()
+                    st.rerun()
+            with older:
+                if next_cursor is not None and st.button("Older", key="history_older"):
+                    cursors.append(next_cursor)
                     st.rerun()
 
         # Buy me a coffee
@@ -271,6 +151,26 @@ if auth_status:
     with tab2:
         st.write("Alert settings coming soon — for now, all core tickers are on.")
 
+    if username in ADMINS:
+        with tabs[2]:
+            last = st.number_input("Scans", min_value=1, max_value=500, value=20, step=5)
+            runs, phases, tickers = ui_data.scan_report(int(last))
+            if not runs:
+                st.write("No scans recorded yet.")
+            else:
+                latest = runs[0]
+                col1, col2, col3, col4 = st.columns(4)
+                with col1: st.metric("Last scan", f"{latest['duration'] or 0:.1f}s")
+                with col2: st.metric("Tickers", latest['scanned'])
+                with col3: st.metric("Signals", latest['signals'])
+                with col4: st.metric("Errors", latest['errors'])
+                st.markdown("**Slowest phases**")
+                st.table([{"phase": name, "mean s": round(mean, 3), "max s": round(peak, 3)} for name, mean, peak in phases])
+                st.markdown("**Slowest tickers**")
+                st.table([{"ticker": name, "mean s": round(mean, 3), "max s": round(peak, 3)} for name, mean, peak in tickers[:20]])
+                st.markdown("**Recent scans**")
+                st.table([{k: run[k] for k in ('started', 'duration', 'scanned', 'signals', 'errors')} for run in runs])
+
 elif auth_status is False:
     st.error("Wrong username/password")
 elif auth_status is None:
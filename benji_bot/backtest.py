@@ -0,0 +1,235 @@
+"""Vectorized backtest of the scanner's signal rule (or model.pkl).
+
+Replays the scanner's daily decision on a multi-year OHLCV panel: momentum
+vs 9 bars back, pop_estimate = 50 + momentum*w_m + sentiment*w_s, fire when
+pop > threshold, one open signal per ticker, ~2% OTM strike, held to
+expiry. The formula trades calls or puts by the sign of momentum; a model
+(trained on up-moves only) always trades calls, as the scanner does. Every
+step is a NumPy operation across all tickers; the only Python loop is over
+dates, to enforce the one-open-signal-per-ticker rule.
+
+    python backtest.py prices.db
+    python backtest.py panel.csv --sweep --thresholds 60:85:1 --momentum-weights 100:300:20 --sentiment-weights 0:100:10
+
+Panels: prices.db (price_store), or a long-format CSV/Parquet with ticker,
+date, close, volume and optional sentiment columns, or an .npz with dates,
+tickers, close, volume (T x N) and optional sentiment.
+"""
+import argparse
+import itertools
+import json
+import os
+import pickle
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import features
+import pricing
+
+Panel = namedtuple('Panel', 'dates tickers close volume sentiment')
+Params = namedtuple('Params', 'threshold momentum_weight sentiment_weight')
+
+MOMENTUM_LAG = 9      # scanner: hist['Close'][-1] vs hist['Close'][-10]
+MIN_BARS = 20         # scanner skips tickers with fewer bars
+HOLD_BARS = 7         # ~second weekly expiry
+DEFAULT_SENTIMENT = 0.5  # neutral pulse when the panel has no sentiment column
+DEFAULT_PARAMS = Params(72.0, 220.0, 50.0)
+
+
+# === LOADING ===
+def _from_long(df):
+    df = df.rename(columns=str.lower)
+    df['date'] = pd.to_datetime(df['date'])
+    wide = {col: df.pivot_table(index='date', columns='ticker', values=col, aggfunc='last').sort_index()
+            for col in ('close', 'volume', 'sentiment') if col in df}
+    close = wide['close']
+    tickers = list(close.columns)
+    align = lambda w: w.reindex(index=close.index, columns=tickers).to_numpy(dtype=float)
+    return Panel(close.index.to_numpy(), np.array(tickers), close.to_numpy(dtype=float),
+                 align(wide['volume']), align(wide['sentiment']) if 'sentiment' in wide else None)
+
+
+def load_panel(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.db', '.sqlite'):
+        with sqlite3.connect(path) as conn:
+            return _from_long(pd.read_sql_query('SELECT ticker, date, close, volume FROM bars', conn))
+    if ext == '.csv':
+        return _from_long(pd.read_csv(path))
+    if ext == '.parquet':
+        return _from_long(pd.read_parquet(path))
+    if ext == '.npz':
+        with np.load(path, allow_pickle=False) as data:
+            return Panel(data['dates'], data['tickers'], data['close'].astype(float), data['volume'].astype(float),
+                         data['sentiment'].astype(float) if 'sentiment' in data else None)
+    raise ValueError(f"unsupported panel format: {path}")
+
+
+# === PREPARATION (done once, shared by every parameter set) ===
+Prepared = namedtuple('Prepared', 'close momentum sentiment valid exit_close premium is_call strike model_pop model_entry')
+
+
+def prepare(panel, hold=HOLD_BARS, sentiment=DEFAULT_SENTIMENT, model=None):
+    close = panel.close
+    T, N = close.shape
+    lagged = np.full_like(close, np.nan)
+    lagged[MOMENTUM_LAG:] = close[:-MOMENTUM_LAG]
+    momentum = (close - lagged) / lagged
+
+    bars_seen = np.cumsum(~np.isnan(close), axis=0)
+    valid = (bars_seen >= MIN_BARS) & ~np.isnan(momentum)
+
+    sent = panel.sentiment if panel.sentiment is not None else np.full_like(close, sentiment)
+
+    exit_close = np.full_like(close, np.nan)
+    exit_close[:T - hold] = close[hold:]
+    valid &= ~np.isnan(exit_close)  # signals must reach expiry inside the panel
+
+    # Entry terms don't depend on the rule parameters, so price every cell once
+    returns = pd.DataFrame(close).pct_change(fill_method=None)
+    vol = (returns.rolling(MIN_BARS - 1).std() * np.sqrt(pricing.TRADING_DAYS)).to_numpy()
+    ok = valid & ~np.isnan(vol)
+    valid &= ok
+
+    def entry(is_call):
+        strike = close * np.where(is_call, 1.02, 0.98)
+        premium = np.full_like(close, np.nan)
+        premium[ok] = pricing.bs_premium(close[ok], strike[ok], vol[ok], hold / pricing.TRADING_DAYS, is_call[ok])
+        return premium, is_call, strike
+
+    premium, is_call, strike = entry(momentum > 0)
+    model_pop = model_entry = None
+    if model is not None:
+        model_pop = model_pops(panel, model, sent)
+        model_entry = entry(np.ones_like(valid))  # up-move model: calls only (scoring.sides)
+    return Prepared(close, momentum, sent, valid, exit_close, premium, is_call, strike, model_pop, model_entry)
+
+
+def model_pops(panel, model, sent, iv_rank=65.0):
+    """model.pkl POP (0-100) for every (date, ticker) cell, via one predict_proba call."""
+    T, N = panel.close.shape
+    blocks = []
+    for j in range(N):
+        f = features.rolling_features(panel.close[:, j], panel.volume[:, j])
+        blocks.append(np.column_stack([f, sent[:, j], np.full(T, iv_rank)]))
+    X = np.concatenate(blocks)  # column-major: ticker j occupies rows j*T .. (j+1)*T
+    ok = ~np.isnan(X).any(axis=1)
+    pops = np.full(len(X), np.nan)
+    if ok.any():
+        pops[ok] = model.predict_proba(X[ok])[:, 1] * 100
+    return pops.reshape(N, T).T
+
+
+# === SIMULATION ===
+def select(candidates, hold):
+    """One open signal per ticker: greedy in time, vectorized across tickers."""
+    T, N = candidates.shape
+    chosen = np.zeros_like(candidates)
+    next_free = np.zeros(N, dtype=np.int64)
+    for t in range(T):
+        fire = candidates[t] & (next_free <= t)
+        chosen[t] = fire
+        next_free[fire] = t + hold + 1  # expired signal is settled, ticker can fire the day after
+    return chosen
+
+
+def run(prep, params=DEFAULT_PARAMS, hold=HOLD_BARS, use_model=False):
+    """Backtest one parameter set. Returns a metrics dict."""
+    if use_model:
+        pop = prep.model_pop
+    else:
+        pop = 50 + prep.momentum * params.momentum_weight + prep.sentiment * params.sentiment_weight
+    premium, is_call, strike = prep.model_entry if use_model else (prep.premium, prep.is_call, prep.strike)
+    candidates = prep.valid & (np.nan_to_num(pop, nan=-np.inf) > params.threshold)
+    t_idx, n_idx = np.nonzero(select(candidates, hold))
+
+    pnl = pricing.play_pnl(premium[t_idx, n_idx], strike[t_idx, n_idx],
+                           prep.exit_close[t_idx, n_idx], is_call[t_idx, n_idx])
+    order = np.argsort(t_idx + hold, kind='stable')  # realized in exit order
+    equity = np.cumsum(pnl[order])
+    drawdown = np.max(np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity) if len(equity) else 0.0
+    return {
+        'threshold': params.threshold,
+        'momentum_weight': params.momentum_weight,
+        'sentiment_weight': params.sentiment_weight,
+        'signals': int(len(pnl)),
+        'hit_rate': float((pnl > 0).mean()) if len(pnl) else 0.0,
+        'total_pnl': float(pnl.sum()),
+        'pnl_per_play': float(pnl.mean()) if len(pnl) else 0.0,
+        'max_drawdown': float(drawdown),
+    }
+
+
+# === PARAMETER SWEEPS ===
+_worker_prep = None
+_worker_hold = HOLD_BARS
+
+
+def _init_worker(prep, hold):
+    global _worker_prep, _worker_hold
+    _worker_prep, _worker_hold = prep, hold
+
+
+def _run_chunk(chunk):
+    return [run(_worker_prep, params, _worker_hold) for params in chunk]
+
+
+def sweep(prep, grid, hold=HOLD_BARS, processes=None, chunk_size=50):
+    """Run every Params in grid across a process pool; results sorted by total P&L."""
+    grid = list(grid)
+    chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(prep, hold)) as pool:
+        results = [r for chunk in pool.map(_run_chunk, chunks) for r in chunk]
+    return sorted(results, key=lambda r: r['total_pnl'], reverse=True)
+
+
+def _span(text):
+    """'start:stop:step' (inclusive) or a single value -> list of floats."""
+    parts = [float(p) for p in text.split(':')]
+    if len(parts) == 1:
+        return parts
+    start, stop, step = parts
+    return list(np.arange(start, stop + step / 2, step))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the Benji signal rule or model.")
+    parser.add_argument('panel', help="prices.db, .csv, .parquet or .npz")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_PARAMS.threshold)
+    parser.add_argument('--momentum-weight', type=float, default=DEFAULT_PARAMS.momentum_weight)
+    parser.add_argument('--sentiment-weight', type=float, default=DEFAULT_PARAMS.sentiment_weight)
+    parser.add_argument('--sentiment', type=float, default=DEFAULT_SENTIMENT, help="used when the panel has no sentiment")
+    parser.add_argument('--hold', type=int, default=HOLD_BARS, help="bars from signal to expiry")
+    parser.add_argument('--model', help="backtest this model (model.pkl or an artifact directory) instead of the formula")
+    parser.add_argument('--sweep', action='store_true')
+    parser.add_argument('--thresholds', default='72')
+    parser.add_argument('--momentum-weights', default='220')
+    parser.add_argument('--sentiment-weights', default='50')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--top', type=int, default=20, help="sweep results to print")
+    args = parser.parse_args(argv)
+
+    model = None
+    if args.model and os.path.isdir(args.model):
+        import model_artifact
+        model = model_artifact.load(args.model, features.FEATURE_COLUMNS)
+    elif args.model:
+        with open(args.model, 'rb') as f:
+            model = pickle.load(f)
+    prep = prepare(load_panel(args.panel), args.hold, args.sentiment, model)
+
+    if args.sweep:
+        grid = [Params(*p) for p in itertools.product(_span(args.thresholds), _span(args.momentum_weights), _span(args.sentiment_weights))]
+        results = sweep(prep, grid, args.hold, args.processes)[:args.top]
+    else:
+        results = run(prep, Params(args.threshold, args.momentum_weight, args.sentiment_weight), args.hold, use_model=model is not None)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,485 @@
+"""Offline, reproducible benchmarks for the scanner, trainer, sentiment and alerts.
+
+Nothing here touches the network. yfinance is replaced by a stub that
+serves canned OHLCV bars and option chains, Finnhub/Alpha Vantage by a
+local HTTP server returning canned JSON, SMTP by a local stub server and
+Telegram by an in-process sender. Fixtures are either generated
+(deterministic, seeded) or recorded once from the live sources.
+
+    python benchmark.py generate                      # synthetic fixtures -> bench_fixtures/
+    python benchmark.py record --tickers NVDA TSLA    # record live fixtures (needs network/keys)
+    python benchmark.py run --output bench.json       # run the suite, print JSON
+    python benchmark.py run --baseline bench_baseline.json --tolerance 0.2   # exit 1 on regression
+
+Each benchmark reports throughput from the median of --reps runs. With
+--baseline, any metric more than --tolerance below the baseline's value is
+a regression.
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import socketserver
+import statistics
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = 'bench_fixtures'
+METRICS = ['scan_tickers_per_sec', 'feature_rows_per_sec', 'sentiment_texts_per_sec', 'fanout_messages_per_sec']
+
+Fixtures = namedtuple('Fixtures', 'bars chains finnhub alphavantage posts')
+Options = namedtuple('Options', 'calls puts')  # what yf.Ticker().option_chain() returns
+
+
+# === FIXTURES ===
+# bars.csv: ticker,date,open,high,low,close,volume
+# chains.json: {ticker: {"expiries": [...], "chains": {expiry: {"calls": [[strike, bid, ask, last], ...], "puts": [...]}}}}
+# finnhub.json: {ticker: response}; alphavantage.json: response; posts.json: [text, ...]
+def _save(out, bars, chains, finnhub, alphavantage, posts):
+    os.makedirs(out, exist_ok=True)
+    bars.to_csv(os.path.join(out, 'bars.csv'), index=False)
+    for name, data in (('chains', chains), ('finnhub', finnhub), ('alphavantage', alphavantage), ('posts', posts)):
+        with open(os.path.join(out, f'{name}.json'), 'w') as f:
+            json.dump(data, f)
+
+
+def load(path=FIXTURE_DIR):
+    bars = pd.read_csv(os.path.join(path, 'bars.csv'), parse_dates=['date'])
+    loaded = {}
+    for name in ('chains', 'finnhub', 'alphavantage', 'posts'):
+        with open(os.path.join(path, f'{name}.json')) as f:
+            loaded[name] = json.load(f)
+    return Fixtures(bars, **loaded)
+
+
+def _chain_rows(rng, spot):
+    step = 1.0 if spot < 50 else 2.5 if spot < 200 else 5.0
+    strikes = np.arange(np.floor(spot * 0.7 / step) * step, spot * 1.3 + step, step)
+    book = {}
+    for side, sign in (('calls', 1), ('puts', -1)):
+        value = np.maximum(sign * (spot - strikes), 0) + spot * 0.02 * rng.uniform(0.5, 1.5, len(strikes))
+        bid = np.round(value * 0.97, 2)
+        book[side] = [[float(k), float(b), float(round(v * 1.03, 2)), float(round(v, 2))]
+                      for k, b, v in zip(strikes, bid, value)]
+    return book
+
+
+def generate(out=FIXTURE_DIR, tickers=200, days=400, posts=5000, seed=7):
+    """Deterministic synthetic fixtures: random-walk bars, chains around the last close, canned sentiment."""
+    rng = np.random.default_rng(seed)
+    names = [f'T{i:03d}' for i in range(tickers)]
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    frames, chains, finnhub = [], {}, {}
+    for ticker in names:
+        close = rng.uniform(20, 400) * np.exp(np.cumsum(rng.normal(0.0005, 0.02, days)))
+        open_ = close * (1 + rng.normal(0, 0.005, days))
+        frames.append(pd.DataFrame({
+            'ticker': ticker, 'date': dates, 'open': open_,
+            'high': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, days)),
+            'low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, days)),
+            'close': close, 'volume': rng.lognormal(15, 0.5, days).round()}))
+        expiries = [(dates[-1] + timedelta(days=d)).date().isoformat() for d in (4, 11, 18)]
+        chains[ticker] = {'expiries': expiries, 'chains': {expiries[1]: _chain_rows(rng, close[-1])}}
+        finnhub[ticker] = {'sentiment': {'score': float(rng.uniform(0, 1))}}
+    alphavantage = {'feed': [{'overall_sentiment_score': float(s)} for s in rng.uniform(0, 1, 10)]}
+    words = ['ripping', 'dumping', 'bullish', 'bearish', 'breakout', 'overvalued', 'buy', 'sell', 'moon', 'short',
+             'earnings', 'volume', 'dip', 'rally', 'crash', 'hype', 'calls', 'puts', 'AI', 'guidance']
+    texts = [f"$ {names[rng.integers(tickers)]} " + ' '.join(rng.choice(words, rng.integers(4, 14))) for _ in range(posts)]
+    _save(out, pd.concat(frames, ignore_index=True), chains, finnhub, alphavantage, texts)
+    return out
+
+
+def record(out=FIXTURE_DIR, tickers=('NVDA', 'TSLA', 'AMD', 'SMCI', 'META', 'AAPL', 'MSFT', 'GOOGL', 'AVGO'), days=400, posts=5000):
+    """Record live bars, chains and sentiment responses once, for replay offline."""
+    import requests
+    import yfinance as yf
+
+    import option_chains
+    import price_store
+    from sentiment_client import PROVIDERS
+
+    frames = price_store._download(list(tickers), (date.today() - timedelta(days=days)).isoformat())
+    bars = pd.concat([f.rename(columns=str.lower).rename_axis('date').reset_index().assign(ticker=t)
+                      for t, f in frames.items()], ignore_index=True)
+    chains, finnhub = {}, {}
+    for ticker in tickers:
+        expiries = list(yf.Ticker(ticker).options)
+        if not expiries:
+            continue
+        expiry = option_chains.pick_expiry(expiries)
+        opts = yf.Ticker(ticker).option_chain(expiry)
+        chains[ticker] = {'expiries': expiries, 'chains': {expiry: {
+            side: frame[['strike', 'bid', 'ask', 'lastPrice']].astype(float).values.tolist()
+            for side, frame in (('calls', opts.calls), ('puts', opts.puts))}}}
+        finnhub[ticker] = requests.get(PROVIDERS['finnhub']['url'] + '/news-sentiment', timeout=10,
+                                       params={'symbol': ticker, 'token': os.getenv('FINNHUB_TOKEN', 'demo')}).json()
+    alphavantage = requests.get(PROVIDERS['alphavantage']['url'] + '/query', timeout=10,
+                                params={'function': 'NEWS_SENTIMENT', 'tickers': ','.join(tickers[:2]),
+                                        'apikey': os.getenv('ALPHAVANTAGE_KEY', 'demo')}).json()
+    # There is no free X feed; posts are the same templated texts the scanner scores
+    texts = [f"$ {t} {s}" for t in tickers for s in ('ripping higher on AI news! Buy now!', 'dumping hard, sell before worse.',
+                                                   'Huge volume, breakout!', 'correction incoming.')]
+    _save(out, bars[['ticker', 'date', 'open', 'high', 'low', 'close', 'volume']], chains, finnhub, alphavantage,
+          (texts * (posts // len(texts) + 1))[:posts])
+    return out
+
+
+# === STUBS ===
+class StubYFinance:
+    """Stands in for the yfinance module: download() and Ticker().options/.option_chain().
+
+    Dates are shifted by whole weeks so the newest fixture bar lands on the
+    latest weekday, which keeps old recordings inside the scanner's window.
+    """
+
+    def __init__(self, fixtures):
+        bars = fixtures.bars.copy()
+        latest = pd.Timestamp.today().normalize()
+        while latest.weekday() >= 5:
+            latest -= pd.Timedelta(days=1)
+        self.shift = pd.Timedelta(days=7 * ((latest - bars['date'].max()).days // 7))
+        bars['date'] += self.shift
+        self.frames = {t: f.set_index('date')[['open', 'high', 'low', 'close', 'volume']]
+                       .set_axis(['Open', 'High', 'Low', 'Close', 'Volume'], axis=1)
+                       for t, f in bars.groupby('ticker')}
+        self.chains = fixtures.chains
+
+    def _date(self, iso):
+        return (pd.Timestamp(iso) + self.shift).date().isoformat()
+
+    def download(self, tickers, start=None, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        found = {t: self.frames[t].loc[start:] for t in tickers if t in self.frames}
+        if not found:
+            return pd.DataFrame()
+        return pd.concat(found, axis=1)  # (ticker, field) columns, like group_by='ticker'
+
+    def Ticker(self, ticker):
+        stub = self
+        recorded = self.chains.get(ticker, {'expiries': [], 'chains': {}})
+        by_date = {stub._date(e): chain for e, chain in recorded['chains'].items()}
+
+        class _Ticker:
+            options = tuple(stub._date(e) for e in recorded['expiries'])
+
+            @staticmethod
+            def option_chain(expiry):
+                book = by_date.get(expiry) or next(iter(by_date.values()))
+                frame = lambda rows: pd.DataFrame(rows, columns=['strike', 'bid', 'ask', 'lastPrice'])
+                return Options(frame(book['calls']), frame(book['puts']))
+        return _Ticker()
+
+
+class SentimentStub:
+    """Local HTTP server answering the Finnhub and Alpha Vantage paths from fixtures."""
+
+    def __init__(self, fixtures):
+        finnhub, alphavantage = fixtures.finnhub, fixtures.alphavantage
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real APIs
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.endswith('/news-sentiment'):
+                    data = finnhub.get(query.get('symbol', [''])[0], {})
+                else:
+                    data = alphavantage
+                body = json.dumps(data).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def providers(self):
+        """PROVIDERS pointed at this server, with the rate limits lifted (the stub has none)."""
+        from sentiment_client import PROVIDERS
+        return {name: dict(p, url=self.url, per_minute=1_000_000, daily_quota=None) for name, p in PROVIDERS.items()}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SmtpStub:
+    """Just enough SMTP (no TLS, no auth) to accept and count messages."""
+
+    def __init__(self):
+        self.received = 0
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(b'220 stub ESMTP\r\n')
+                for line in self.rfile:
+                    verb = line[:4].upper()
+                    if verb == b'DATA':
+                        self.wfile.write(b'354 go ahead\r\n')
+                        for body_line in self.rfile:
+                            if body_line in (b'.\r\n', b'.\n'):
+                                break
+                        stub.received += 1
+                        self.wfile.write(b'250 queued\r\n')
+                    elif verb == b'QUIT':
+                        self.wfile.write(b'221 bye\r\n')
+                        return
+                    elif verb == b'EHLO':
+                        self.wfile.write(b'250 stub\r\n')
+                    else:
+                        self.wfile.write(b'250 ok\r\n')
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def config(self):
+        return {'host': '127.0.0.1', 'port': self.port, 'user': None, 'password': None,
+                'sender': 'bench@localhost', 'starttls': False}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubTelegram:
+    """TelegramSender stand-in: accepts everything instantly (measures our side, not Telegram's limits)."""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send_many(self, messages, timeout=None):
+        self.sent += len(messages)
+        return [None] * len(messages)
+
+
+@contextmanager
+def offline(fixtures, workdir):
+    """Point the scanner's storage, price store, yfinance and sentiment client at local stand-ins."""
+    import price_store
+    import scanner
+    import storage
+    from notifier import Notifier
+    from sentiment_client import SentimentClient
+
+    saved = (price_store.yf, price_store.PRICE_DB, storage.DB_PATH)
+    yf_stub = StubYFinance(fixtures)
+    sentiment = SentimentStub(fixtures)
+    smtp = SmtpStub()
+    price_store.yf = yf_stub  # option_chains fetches through price_store.yfinance() too
+    storage.DB_PATH = os.path.join(workdir, 'benji.db')
+    scanner.shutdown()
+    with scanner._resources_lock:
+        scanner._resources.update({
+            'model': None,
+            'sentiment_client': SentimentClient(providers=sentiment.providers()),
+            'notifier': Notifier(telegram=StubTelegram(), smtp=smtp.config()).start(),
+        })
+    try:
+        yield smtp
+    finally:
+        scanner.shutdown()
+        if storage._writer is not None:
+            storage._writer.close()
+            storage._writer = None
+        storage._local.__dict__.clear()
+        sentiment.close()
+        smtp.close()
+        price_store.yf, price_store.PRICE_DB, storage.DB_PATH = saved
+
+
+# === BENCHMARKS ===
+def _timed(fn, reps, setup=None):
+    """Median seconds over reps runs of fn(); setup() runs untimed before each."""
+    times = []
+    for _ in range(reps):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def bench_scan(fixtures, workdir, reps=3):
+    """analyze_and_signal() over every fixture ticker, cold caches each rep."""
+    import metrics
+    import price_store
+    import scanner
+    import storage
+    from sentiment_cache import SentimentCache
+
+    tickers = sorted(fixtures.bars['ticker'].unique())
+    reps_seen = itertools.count()
+    with offline(fixtures, workdir):
+        storage.transaction(lambda conn: conn.executemany(
+            "INSERT OR IGNORE INTO preferences (username, ticker, enabled) VALUES ('bench', ?, 1)", [(t,) for t in tickers]))
+
+        def reset():
+            rep = next(reps_seen)
+            price_store.PRICE_DB = os.path.join(workdir, f'prices-{rep}.db')
+            storage.transaction(lambda conn: (conn.execute('DELETE FROM active_signals'),
+                                              conn.execute('DELETE FROM ticker_state')))
+            with scanner._resources_lock:
+                old = scanner._resources.pop('sentiment_cache', None)
+                scanner._resources['sentiment_cache'] = SentimentCache(os.path.join(workdir, f'sentiment-{rep}.jsonl'))
+                scanner._resources.pop('option_chains', None)
+                scanner._resources.pop('ticker_index', None)  # every rep evaluates every ticker
+            if old is not None:
+                old.close()
+
+        seconds = _timed(scanner.analyze_and_signal, reps, reset)
+        scanned = metrics.METRICS.scans[-1]['scanned']
+    return {'scan_seconds': seconds, 'scan_tickers': scanned, 'scan_tickers_per_sec': scanned / seconds}
+
+
+def bench_features(fixtures, workdir, reps=3, days=400):
+    """train_model.fetch_historical_data() (download into an empty store + feature build)."""
+    import price_store
+    import train_model
+
+    tickers = sorted(fixtures.bars['ticker'].unique())
+    reps_seen = itertools.count()
+    result = {}
+    with offline(fixtures, workdir):
+        def reset():
+            price_store.PRICE_DB = os.path.join(workdir, f'features-{next(reps_seen)}.db')
+
+        def run():
+            X, y = train_model.fetch_historical_data(tickers, days=days)
+            result['rows'] = len(X)
+        seconds = _timed(run, reps, reset)
+    return {'feature_seconds': seconds, 'feature_rows': result['rows'], 'feature_rows_per_sec': result['rows'] / seconds}
+
+
+def bench_sentiment(fixtures, reps=3, processes=None):
+    """VaderService.score() on every fixture post with an empty memo."""
+    from vader_service import VaderService
+
+    texts = fixtures.posts
+    services = []
+
+    def setup():
+        services.append(VaderService(processes=processes))
+
+    seconds = _timed(lambda: services[-1].score(texts), reps, setup)
+    for service in services:
+        service.close()
+    return {'sentiment_seconds': seconds, 'sentiment_texts': len(texts), 'sentiment_texts_per_sec': len(texts) / seconds}
+
+
+def bench_fanout(messages=2000, reps=3):
+    """Notifier: enqueue `messages` emails + `messages` Telegram messages and wait until all are delivered."""
+    from notifier import Notifier
+
+    smtp = SmtpStub()
+    try:
+        def run():
+            notifier = Notifier(telegram=StubTelegram(), smtp=smtp.config()).start()
+            for i in range(messages):
+                notifier.email(f'user{i}@localhost', 'Benji Signal', f'Benji: Buy T{i % 200:03d} – $100 play')
+                notifier.telegram_message(str(i), f'Benji: Buy T{i % 200:03d} – $100 play')
+            notifier.flush()
+            notifier.stop()
+        seconds = _timed(run, reps)
+    finally:
+        smtp.close()
+    total = 2 * messages
+    return {'fanout_seconds': seconds, 'fanout_messages': total, 'fanout_messages_per_sec': total / seconds}
+
+
+def run_suite(fixtures, reps=3, only=None):
+    workdir = tempfile.mkdtemp(prefix='benji-bench-')
+    try:
+        results = {}
+        benches = {
+            'scan': lambda: bench_scan(fixtures, os.path.join(workdir, 'scan'), reps),
+            'features': lambda: bench_features(fixtures, os.path.join(workdir, 'features'), reps),
+            'sentiment': lambda: bench_sentiment(fixtures, reps),
+            'fanout': lambda: bench_fanout(reps=reps),
+        }
+        for name, bench in benches.items():
+            if only and name not in only:
+                continue
+            os.makedirs(os.path.join(workdir, name), exist_ok=True)
+            results.update(bench())
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Metrics more than `tolerance` below the baseline: [(metric, baseline, current)]."""
+    return [(metric, baseline[metric], results[metric]) for metric in METRICS
+            if metric in results and metric in baseline and results[metric] < baseline[metric] * (1 - tolerance)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline Benji Bot benchmarks.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    gen = sub.add_parser('generate', help="write deterministic synthetic fixtures")
+    gen.add_argument('--fixtures', default=FIXTURE_DIR)
+    gen.add_argument('--tickers', type=int, default=200)
+    gen.add_argument('--days', type=int, default=400)
+    gen.add_argument('--posts', type=int, default=5000)
+    gen.add_argument('--seed', type=int, default=7)
+    rec = sub.add_parser('record', help="record fixtures from the live sources")
+    rec.add_argument('--fixtures', default=FIXTURE_DIR)
+    rec.add_argument('--tickers', nargs='+', default=['NVDA', 'TSLA', 'AMD', 'SMCI', 'META', 'AAPL', 'MSFT', 'GOOGL', 'AVGO'])
+    rec.add_argument('--days', type=int, default=400)
+    run = sub.add_parser('run', help="run the suite")
+    run.add_argument('--fixtures', default=FIXTURE_DIR)
+    run.add_argument('--reps', type=int, default=3)
+    run.add_argument('--only', nargs='+', choices=['scan', 'features', 'sentiment', 'fanout'])
+    run.add_argument('--output', help="also write the results JSON here")
+    run.add_argument('--baseline', help="results JSON to compare against")
+    run.add_argument('--tolerance', type=float, default=0.2, help="allowed fractional slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        print(generate(args.fixtures, args.tickers, args.days, args.posts, args.seed))
+        return 0
+    if args.command == 'record':
+        print(record(args.fixtures, args.tickers, args.days))
+        return 0
+
+    if not os.path.isdir(args.fixtures):
+        generate(args.fixtures)
+    results = run_suite(load(args.fixtures), args.reps, args.only)
+    report = {'results': results}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        baseline = baseline.get('results', baseline)
+        report['baseline'] = args.baseline
+        report['tolerance'] = args.tolerance
+        report['regressions'] = [{'metric': m, 'baseline': b, 'current': c} for m, b, c in compare(results, baseline, args.tolerance)]
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
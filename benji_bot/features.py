@@ -0,0 +1,118 @@
+"""Vectorized feature/label builder shared by training and live scoring.
+
+Reproduces the original per-row loop in train_model.py bit for bit: every
+rolling reduction is done over a contiguous (rows, 20) window matrix with the
+same summation order pandas uses for Series.std()/mean() on a 20-bar slice.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOW = 20        # bars of history behind each row
+MOMENTUM_LAG = 10  # momentum = close vs 10 bars back
+HORIZON = 5        # label looks 5 bars ahead
+TARGET = 0.03      # label = 1 if the 5-bar move beats +3%
+CHUNK_ROWS = 1 << 16  # bounds the window matrices' memory on big panels
+
+FEATURE_COLUMNS = ['volatility', 'momentum', 'volume_surge', 'sentiment', 'iv_rank']
+
+
+def _stack(panel, tickers):
+    """Concatenate every ticker's closes/volumes and list the row positions to emit."""
+    closes, volumes, rows, offset = [], [], [], 0
+    for ticker in tickers:
+        if ticker not in panel:
+            continue
+        hist = panel[ticker]
+        n = len(hist)
+        closes.append(hist['Close'].to_numpy(dtype=np.float64))
+        volumes.append(hist['Volume'].to_numpy(dtype=np.float64))
+        rows.append(np.arange(WINDOW, n - HORIZON) + offset)
+        offset += n
+    if not closes:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=np.int64)
+    return np.concatenate(closes), np.concatenate(volumes), np.concatenate(rows)
+
+
+def _window_features(close, volume, idx):
+    """volatility, momentum, volume_surge for rows idx of the stacked arrays."""
+    # Row k of each window matrix is the 20-bar slice [i-20, i) for i = idx[k]
+    close_win = np.ascontiguousarray(sliding_window_view(close, WINDOW)[idx - WINDOW])
+    volume_win = np.ascontiguousarray(sliding_window_view(volume, WINDOW)[idx - WINDOW])
+
+    # pct_change().std(): leading NaN is zero-filled and excluded from the count, as pandas does
+    returns = np.zeros_like(close_win)
+    returns[:, 1:] = close_win[:, 1:] / close_win[:, :-1] - 1
+    mean = returns.sum(axis=1) / (WINDOW - 1)
+    sq = (mean[:, None] - returns) ** 2
+    sq[:, 0] = 0
+    volatility = np.sqrt(sq.sum(axis=1) / (WINDOW - 2))
+
+    lagged = close[idx - MOMENTUM_LAG]
+    momentum = (close[idx] - lagged) / lagged
+
+    volume_mean = volume_win.sum(axis=1) / WINDOW
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_surge = np.where(volume_mean > 0, volume[idx] / volume_mean, 1.0)
+    return volatility, momentum, volume_surge
+
+
+def _chunk_features(close, volume, idx):
+    volatility, momentum, volume_surge = _window_features(close, volume, idx)
+    price_change = (close[idx + HORIZON] - close[idx]) / close[idx]
+    return volatility, momentum, volume_surge, (price_change > TARGET).astype(np.int64)
+
+
+def build_features(panel, tickers, random_state=np.random):
+    """Feature matrix and labels for a {ticker: OHLCV frame} panel, in ticker order.
+
+    Sentiment and IV rank are still mock draws; they are taken from
+    random_state in the same interleaved order the old loop used, so a seeded
+    run produces the same matrix as before.
+    """
+    close, volume, rows = _stack(panel, tickers)
+    X = np.empty((len(rows), len(FEATURE_COLUMNS)))
+    y = np.empty(len(rows), dtype=np.int64)
+    for start in range(0, len(rows), CHUNK_ROWS):
+        part = slice(start, start + CHUNK_ROWS)
+        X[part, 0], X[part, 1], X[part, 2], y[part] = _chunk_features(close, volume, rows[part])
+
+    draws = random_state.random_sample((len(rows), 2))
+    X[:, 3] = 0.3 + (0.9 - 0.3) * draws[:, 0]  # mock sentiment
+    X[:, 4] = 40 + (90 - 40) * draws[:, 1]     # mock IV rank
+    return X, y
+
+
+def latest_features(panel, sentiments, iv_rank=65.0):
+    """One feature row per ticker for its most recent bar, for live scoring.
+
+    Only tickers with a sentiment and at least WINDOW + 1 bars are scored.
+    There is no live IV feed yet, so iv_rank defaults to the middle of the
+    mock range the model was trained on. Returns (tickers, X).
+    """
+    tickers = [t for t in sorted(panel) if t in sentiments and len(panel[t]) > WINDOW]
+    X = np.empty((len(tickers), len(FEATURE_COLUMNS)))
+    if not tickers:
+        return tickers, X
+    close = np.concatenate([panel[t]['Close'].to_numpy(dtype=np.float64) for t in tickers])
+    volume = np.concatenate([panel[t]['Volume'].to_numpy(dtype=np.float64) for t in tickers])
+    idx = np.cumsum([len(panel[t]) for t in tickers]) - 1
+    X[:, 0], X[:, 1], X[:, 2] = _window_features(close, volume, idx)
+    X[:, 3] = [sentiments[t] for t in tickers]
+    X[:, 4] = iv_rank
+    return tickers, X
+
+
+def rolling_features(close, volume):
+    """volatility, momentum, volume_surge for every bar of one ticker, shape (n, 3).
+
+    Rows before WINDOW have no full history and are NaN. Same definitions as
+    build_features(), for scoring whole histories (e.g. backtests).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    out = np.full((len(close), 3), np.nan)
+    idx = np.arange(WINDOW, len(close))
+    for start in range(0, len(idx), CHUNK_ROWS):
+        part = idx[start:start + CHUNK_ROWS]
+        out[part, 0], out[part, 1], out[part, 2] = _window_features(close, volume, part)
+    return out
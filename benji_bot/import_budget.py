@@ -0,0 +1,93 @@
+"""Import-time budget report for the app and CLI entry points.
+
+Each entry point's imports are timed in a fresh interpreter with
+`python -X importtime`, so nothing is shared or already cached. The report
+lists total import time against the budget and the slowest packages pulled
+in, each charged with the self time of all its modules at any depth.
+Modules the interpreter loads at startup (site, encodings, ...) are left out.
+
+    python import_budget.py                # JSON report, exit 1 if over budget
+    python import_budget.py --top 5 --runs 5
+"""
+import argparse
+import functools
+import json
+import os
+import re
+import subprocess
+import sys
+
+# Entry point -> (modules imported at startup, budget in ms).
+# 'app' is what app.py imports before the first page renders (the script itself
+# can't be imported outside `streamlit run`).
+ENTRY_POINTS = {
+    'app': (['streamlit', 'dotenv', 'storage', 'scanner_service', 'ui_data'], 1500),
+    'scanner_service': (['scanner_service'], 100),
+    'scanner': (['scanner'], 2500),
+    'train_model': (['train_model'], 1200),
+    'backtest': (['backtest'], 1200),
+    'benchmark': (['benchmark'], 1200),
+}
+
+_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def _importtime(code, cwd=None):
+    """[(self us, module)] for every import `code` triggers in a fresh interpreter, startup included."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed')
+    return [(int(m.group(1)), m.group(4)) for m in map(_LINE.match, proc.stderr.splitlines()) if m]
+
+
+@functools.lru_cache(maxsize=None)
+def startup_modules(cwd=None):
+    """Modules the interpreter has imported before running any code."""
+    return frozenset(name for _, name in _importtime('pass', cwd))
+
+
+def measure(modules, cwd=None):
+    """(total_ms, {root package: self ms summed over its modules}) for importing modules in a fresh interpreter."""
+    skip = startup_modules(cwd)
+    packages = {}
+    for self_us, name in _importtime(''.join(f'import {m}\n' for m in modules), cwd):
+        if name not in skip:
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_us / 1000
+    return sum(packages.values()), packages
+
+
+def report(entry_points=ENTRY_POINTS, runs=3, top=8, cwd=None):
+    results = {}
+    for name, (modules, budget) in entry_points.items():
+        try:
+            samples = [measure(modules, cwd) for _ in range(runs)]
+        except RuntimeError as e:
+            results[name] = {'error': str(e), 'budget_ms': budget}
+            continue
+        samples.sort(key=lambda s: s[0])
+        total, packages = samples[len(samples) // 2]  # median run
+        slowest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        results[name] = {
+            'total_ms': round(total, 1),
+            'budget_ms': budget,
+            'over_budget': total > budget,
+            'slowest': [{'module': module, 'ms': round(ms, 1)} for module, ms in slowest],
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time budget report.")
+    parser.add_argument('--runs', type=int, default=3, help="fresh interpreters per entry point (median is reported)")
+    parser.add_argument('--top', type=int, default=8, help="slowest packages to list")
+    parser.add_argument('--only', nargs='+', choices=list(ENTRY_POINTS))
+    args = parser.parse_args(argv)
+    entry_points = {k: v for k, v in ENTRY_POINTS.items() if not args.only or k in args.only}
+    results = report(entry_points, args.runs, args.top, cwd=os.path.dirname(os.path.abspath(__file__)))
+    print(json.dumps(results, indent=2))
+    return 1 if any(r.get('over_budget') or 'error' in r for r in results.values()) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
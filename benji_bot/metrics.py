@@ -0,0 +1,178 @@
+"""Process-wide instrumentation: timing spans, counters and error counts.
+
+Hot paths wrap their work in span('name') (optionally per ticker) and call
+error('where', exc) instead of swallowing failures silently. While a scan
+is running, every span also lands in that scan's record, so the last N
+scans keep their per-phase and per-ticker timings. render() produces
+Prometheus text exposition; serve() exposes it over HTTP.
+
+Components with a stats() method (caches, clients, notifier) can be
+registered as collectors; their numbers are read at render time.
+"""
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+SLOWEST_TICKERS = 10  # per-ticker timings kept in each scan record
+
+
+class Metrics:
+    def __init__(self, history=50):
+        self.counters = Counter()  # (name, labels) -> count
+        self.timings = {}          # name -> [count, total seconds, max seconds]
+        self.errors = Counter()    # (where, exception type) -> count
+        self.scans = deque(maxlen=history)
+        self._collectors = {}
+        self._scan = None
+        self._lock = threading.Lock()
+
+    # --- recording ---
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, seconds, ticker=None):
+        with self._lock:
+            timing = self.timings.setdefault(name, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+            scan = self._scan
+            if scan is not None:
+                scan['phases'][name] = scan['phases'].get(name, 0.0) + seconds
+                if ticker is not None:
+                    scan['tickers'][ticker] = scan['tickers'].get(ticker, 0.0) + seconds
+
+    @contextmanager
+    def span(self, name, ticker=None):
+        """Time the block under `name` (errors still count, then propagate)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, ticker)
+
+    def error(self, where, exc):
+        with self._lock:
+            self.errors[(where, type(exc).__name__)] += 1
+            if self._scan is not None:
+                self._scan['errors'] += 1
+
+    def absorb(self, record):
+        """Fold a scan record from another process (a shard worker) into this one's totals and current scan.
+
+        Shards run in parallel, so in the current scan each phase counts once,
+        at the slowest shard's time, rather than summed across shards.
+        """
+        with self._lock:
+            for name, seconds in record['phases'].items():
+                timing = self.timings.setdefault(name, [0, 0.0, 0.0])
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+            scan = self._scan
+            if scan is not None:
+                for name, seconds in record['phases'].items():
+                    scan['shard_phases'][name] = max(scan['shard_phases'].get(name, 0.0), seconds)
+                for ticker, seconds in record['slowest']:
+                    scan['tickers'][ticker] = scan['tickers'].get(ticker, 0.0) + seconds
+                scan['errors'] += record['errors']
+
+    def register(self, name, stats_fn):
+        """Read stats_fn() -> {key: number} at render time as benji_<name>_<key>."""
+        with self._lock:
+            self._collectors[name] = stats_fn
+
+    # --- scans ---
+    @contextmanager
+    def scan(self):
+        """Collect every span recorded during the block into one scan record (yielded)."""
+        record = {'started': datetime.now().isoformat(timespec='seconds'), 'phases': {}, 'tickers': {},
+                  'shard_phases': {}, 'errors': 0, 'scanned': 0, 'signals': 0}
+        with self._lock:
+            self._scan = record
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['duration'] = time.perf_counter() - started
+            with self._lock:
+                self._scan = None
+                for name, seconds in record.pop('shard_phases').items():
+                    record['phases'][name] = record['phases'].get(name, 0.0) + seconds
+                record['slowest'] = sorted(record.pop('tickers').items(), key=lambda kv: kv[1], reverse=True)[:SLOWEST_TICKERS]
+                self.scans.append(record)
+            self.observe('scan', record['duration'])
+
+    # --- export ---
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'timings': {name: list(t) for name, t in self.timings.items()},
+                'errors': dict(self.errors),
+                'scans': list(self.scans),
+                'collectors': dict(self._collectors),
+            }
+
+    def render(self):
+        """Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = ['# TYPE benji_span_seconds summary']
+        for name, (count, total, peak) in sorted(snap['timings'].items()):
+            lines.append(f'benji_span_seconds_count{{span="{name}"}} {count}')
+            lines.append(f'benji_span_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f'benji_span_seconds_max{{span="{name}"}} {peak:.6f}')
+        lines.append('# TYPE benji_errors_total counter')
+        for (where, kind), count in sorted(snap['errors'].items()):
+            lines.append(f'benji_errors_total{{where="{where}",type="{kind}"}} {count}')
+        for (name, labels), count in sorted(snap['counters'].items()):
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f'benji_{name}_total{{{label_text}}} {count}' if label_text else f'benji_{name}_total {count}')
+        for name, stats_fn in sorted(snap['collectors'].items()):
+            try:
+                stats = stats_fn()
+            except Exception as e:
+                self.error(f'collector.{name}', e)
+                continue
+            for key, value in sorted(stats.items()):
+                if isinstance(value, (int, float)):
+                    lines.append(f'benji_{name}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics()
+
+inc = METRICS.inc
+span = METRICS.span
+error = METRICS.error
+absorb = METRICS.absorb
+register = METRICS.register
+scan = METRICS.scan
+render = METRICS.render
+
+
+def serve(port, host='0.0.0.0'):
+    """Serve render() at /metrics on a daemon thread. Returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics').start()
+    return server
@@ -0,0 +1,151 @@
+"""Compact, versioned model artifact for the RandomForest.
+
+A trained forest is flattened into a handful of NumPy arrays (every tree's
+nodes concatenated, child links made global) saved as plain .npy files next
+to a manifest.json with the feature schema and training data range:
+
+    model/
+      manifest.json   format, feature_columns, classes, trees, data range...
+      left.npy  right.npy  feature.npy  threshold.npy  value.npy  roots.npy
+
+Arrays are loaded memory-mapped, so loading takes milliseconds and every
+process serving the same artifact shares one copy of the pages. predict_proba
+walks all trees at once with array indexing and reproduces sklearn's output
+(same float32 feature cast, same tree summation order).
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+FORMAT = 1
+ARRAYS = ['left', 'right', 'feature', 'threshold', 'value', 'roots']
+DEFAULT_PATH = 'model'
+
+
+class ForestArtifact:
+    """Array-backed stand-in for a fitted RandomForestClassifier (predict side only)."""
+
+    def __init__(self, arrays, manifest):
+        self.manifest = manifest
+        self.left, self.right = arrays['left'], arrays['right']
+        self.feature, self.threshold = arrays['feature'], arrays['threshold']
+        self.value, self.roots = arrays['value'], arrays['roots']
+        self.classes_ = np.array(manifest['classes'])
+        self.n_features_in_ = manifest['n_features']
+        self.n_estimators = len(self.roots)
+        self.feature_columns = manifest['feature_columns']
+
+    @classmethod
+    def from_sklearn(cls, model, **manifest):
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            leaf = tree.children_left == -1
+            roots.append(offset)
+            left.append(np.where(leaf, -1, tree.children_left + offset))
+            right.append(np.where(leaf, -1, tree.children_right + offset))
+            feature.append(np.where(leaf, 0, tree.feature))  # leaves never split; keep indices valid
+            threshold.append(tree.threshold)
+            counts = tree.value[:, 0, :]
+            value.append(counts / counts.sum(axis=1, keepdims=True))  # what DecisionTreeClassifier.predict_proba returns
+            offset += tree.node_count
+        arrays = {
+            'left': np.concatenate(left).astype(np.int32),
+            'right': np.concatenate(right).astype(np.int32),
+            'feature': np.concatenate(feature).astype(np.int32),
+            'threshold': np.concatenate(threshold).astype(np.float64),
+            'value': np.concatenate(value).astype(np.float64),
+            'roots': np.array(roots, dtype=np.int32),
+        }
+        manifest = dict(manifest, format=FORMAT, classes=[int(c) for c in model.classes_],
+                        n_features=int(model.n_features_in_), trees=len(roots), nodes=int(offset),
+                        max_depth=int(max(e.tree_.max_depth for e in model.estimators_)),
+                        created=datetime.now().isoformat(timespec='seconds'))
+        return cls(arrays, manifest)
+
+    def apply(self, X):
+        """Leaf node (global index) reached in every tree: shape (n_samples, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)  # sklearn compares float32 features to float64 thresholds
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.manifest['max_depth']):
+            left = self.left[node]
+            inner = left != -1
+            if not inner.any():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(inner, np.where(go_left, left, self.right[node]), node)
+        return node
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"expected {self.n_features_in_} features, got {X.shape}")
+        leaves = self.apply(X)
+        proba = np.zeros((len(X), len(self.classes_)))
+        for t in range(self.n_estimators):  # tree order, like sklearn's accumulation
+            proba += self.value[leaves[:, t]]
+        return proba / self.n_estimators
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def save(model, path=DEFAULT_PATH, **manifest):
+    """Write an artifact for a fitted forest (or ForestArtifact), swapping out any existing one at path."""
+    artifact = model if isinstance(model, ForestArtifact) else ForestArtifact.from_sklearn(model, **manifest)
+    tmp, old = path + '.new', path + '.old'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp, f'{name}.npy'), np.ascontiguousarray(getattr(artifact, name)))
+    with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+        json.dump(artifact.manifest, f, indent=2)
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return artifact
+
+
+def load(path=DEFAULT_PATH, feature_columns=None, mmap=True):
+    """Load an artifact (memory-mapped by default).
+
+    With feature_columns, the manifest's schema must match exactly, so a
+    model trained on a different feature layout is never scored silently.
+    """
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT:
+        raise ValueError(f"unsupported model artifact format {manifest.get('format')}")
+    if feature_columns is not None and list(feature_columns) != manifest['feature_columns']:
+        raise ValueError(f"feature schema mismatch: artifact has {manifest['feature_columns']}")
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None) for name in ARRAYS}
+    return ForestArtifact(arrays, manifest)
+
+
+def main(argv=None):
+    """Convert a pickled forest: python model_artifact.py model.pkl [model]"""
+    import argparse
+    import pickle
+
+    from features import FEATURE_COLUMNS
+
+    parser = argparse.ArgumentParser(description="Convert model.pkl to the flat-array artifact.")
+    parser.add_argument('pickle', nargs='?', default='model.pkl')
+    parser.add_argument('output', nargs='?', default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+    with open(args.pickle, 'rb') as f:
+        model = pickle.load(f)
+    artifact = save(model, args.output, feature_columns=FEATURE_COLUMNS, source=os.path.basename(args.pickle))
+    print(f"{artifact.n_estimators} trees, {artifact.manifest['nodes']} nodes -> {args.output}/")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
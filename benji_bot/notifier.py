@@ -0,0 +1,241 @@
+"""Queued, batched alert delivery for email and Telegram.
+
+Callers enqueue and return immediately; a single dispatcher thread drains
+the queue in batches. Each batch reuses one SMTP connection for all of its
+emails and hands its Telegram messages to the shared async sender. Messages
+for a channel that isn't configured are skipped, transient failures are
+retried with exponential backoff, and per-channel delivery latency (enqueue
+to delivered) is tracked for stats().
+"""
+import concurrent.futures
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from email.mime.text import MIMEText
+
+import metrics
+
+Notification = namedtuple('Notification', 'channel recipient subject body enqueued_at attempts')
+
+
+def smtp_config():
+    return {
+        'host': os.getenv('SMTP_SERVER'),
+        'port': int(os.getenv('SMTP_PORT') or 587),
+        'user': os.getenv('SMTP_USER'),
+        'password': os.getenv('SMTP_PASSWORD'),
+        'sender': os.getenv('SMTP_FROM') or os.getenv('SMTP_USER'),
+        'starttls': os.getenv('SMTP_STARTTLS', '1') != '0',
+    }
+
+
+def transient(error):
+    """Whether a failed send is worth retrying: dropped connections, SMTP 4xx, Telegram flood control."""
+    import smtplib
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if 'TelegramError' in names:  # by name: python-telegram-bot is only imported once something is sent
+        # TimedOut may still have been delivered; BadRequest won't get better
+        return 'RetryAfter' in names or ('NetworkError' in names and not names & {'TimedOut', 'BadRequest'})
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException))
+
+
+class Notifier:
+    def __init__(self, telegram=None, smtp=None, batch_size=200, batch_wait=0.5,
+                 max_attempts=4, backoff=2.0, latency_window=1000):
+        self.telegram = telegram  # TelegramSender-like: send_many([(chat_id, text)]) -> [None | Exception]
+        self.smtp = smtp or smtp_config()
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.counters = Counter()
+        self._latency = {'email': deque(maxlen=latency_window), 'telegram': deque(maxlen=latency_window)}
+        self._queue = queue.Queue()
+        self._retry = []  # heap of (due, seq, Notification)
+        self._seq = itertools.count()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._draining = False
+        self._thread = None
+
+    # --- producer side ---
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name='notifier')
+            self._thread.start()
+        return self
+
+    def configured(self, channel):
+        if channel == 'email':
+            return bool(self.smtp['host'])
+        return self.telegram is not None and bool(getattr(self.telegram, 'token', True))
+
+    def email(self, to, subject, body):
+        self._put(Notification('email', to, subject, body, time.time(), 0))
+
+    def telegram_message(self, chat_id, text):
+        self._put(Notification('telegram', chat_id, None, text, time.time(), 0))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is delivered or given up on."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self, timeout=10):
+        """Deliver what's queued, give backed-off retries one last immediate
+        attempt, then stop. Whatever is still pending is counted as dropped."""
+        deadline = time.time() + timeout
+        self.flush(timeout / 2)
+        with self._cond:
+            self._draining = True
+        self.flush(max(0.0, deadline - time.time()))
+        with self._cond:
+            self.counters['dropped'] += self._pending
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self.counters, pending=self._pending)
+            samples = {channel: sorted(values) for channel, values in self._latency.items()}
+        for channel, values in samples.items():
+            if values:
+                stats[f'{channel}_latency_p50'] = values[len(values) // 2]
+                stats[f'{channel}_latency_p95'] = values[min(len(values) - 1, int(len(values) * 0.95))]
+                stats[f'{channel}_latency_max'] = values[-1]
+        return stats
+
+    def _put(self, item):
+        if not self.configured(item.channel):
+            with self._cond:
+                self.counters[f'{item.channel}_skipped'] += 1
+            return
+        with self._cond:
+            self._pending += 1
+            self.counters[f'{item.channel}_queued'] += 1
+        self._queue.put(item)
+
+    # --- dispatcher side ---
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            emails = [n for n in batch if n.channel == 'email']
+            chats = [n for n in batch if n.channel == 'telegram']
+            if emails:
+                with metrics.span('api.smtp'):
+                    self._send_emails(emails)
+            if chats:
+                with metrics.span('api.telegram'):
+                    self._send_telegram(chats)
+
+    def _next_batch(self):
+        now = time.time()
+        wait = self.batch_wait
+        if self._draining:
+            now = float('inf')  # stopping: retries go now instead of waiting out their backoff
+        if self._retry:
+            wait = max(0.0, min(wait, self._retry[0][0] - now))
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=wait))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        now = float('inf') if self._draining else time.time()
+        while self._retry and self._retry[0][0] <= now and len(batch) < self.batch_size:
+            batch.append(heapq.heappop(self._retry)[2])
+        return batch
+
+    def _send_emails(self, items):
+        import smtplib
+        cfg = self.smtp
+        try:
+            server = smtplib.SMTP(cfg['host'], cfg['port'], timeout=30)
+        except (OSError, smtplib.SMTPException) as e:
+            for item in items:
+                self._finish(item, e)
+            return
+        try:
+            if cfg['starttls']:
+                server.starttls()
+            if cfg['user']:
+                server.login(cfg['user'], cfg['password'])
+        except (OSError, smtplib.SMTPException) as e:
+            for item in items:
+                self._finish(item, e)
+            self._quit(server)
+            return
+        for i, item in enumerate(items):
+            msg = MIMEText(item.body)
+            msg['Subject'] = item.subject
+            msg['From'] = cfg['sender'] or ''
+            msg['To'] = item.recipient
+            try:
+                server.sendmail(cfg['sender'], item.recipient, msg.as_string())
+                self._finish(item, None)
+            except smtplib.SMTPServerDisconnected as e:
+                # connection died: this and everything after it goes back for retry
+                for rest in items[i:]:
+                    self._finish(rest, e)
+                return
+            except (OSError, smtplib.SMTPException) as e:
+                self._finish(item, e)
+        self._quit(server)
+
+    @staticmethod
+    def _quit(server):
+        import smtplib
+        try:
+            server.quit()
+        except (OSError, smtplib.SMTPException):
+            pass
+
+    def _send_telegram(self, items):
+        try:
+            results = self.telegram.send_many([(item.recipient, item.body) for item in items], timeout=120)
+        except concurrent.futures.TimeoutError as e:
+            # some of the batch may have gone out: retrying it would send duplicates
+            for item in items:
+                self._finish(item, e, retry=False)
+            return
+        except Exception as e:
+            results = [e] * len(items)
+        for item, error in zip(items, results):
+            self._finish(item, error)
+
+    def _finish(self, item, error, retry=True):
+        now = time.time()
+        if error is not None:
+            metrics.error(item.channel, error)
+        with self._cond:
+            if error is None:
+                self.counters[f'{item.channel}_sent'] += 1
+                self._latency[item.channel].append(now - item.enqueued_at)
+            elif retry and not self._draining and item.attempts + 1 < self.max_attempts and transient(error):
+                self.counters[f'{item.channel}_retried'] += 1
+                # honour Telegram's RetryAfter hint when there is one
+                delay = getattr(error, 'retry_after', None) or self.backoff * 2 ** item.attempts
+                if hasattr(delay, 'total_seconds'):
+                    delay = delay.total_seconds()
+                heapq.heappush(self._retry, (now + delay, next(self._seq), item._replace(attempts=item.attempts + 1)))
+                return
+            else:
+                self.counters[f'{item.channel}_failed'] += 1
+                self.counters[f'{item.channel}_error_{type(error).__name__}'] += 1
+            self._pending -= 1
+            self._cond.notify_all()
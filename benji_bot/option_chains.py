@@ -0,0 +1,106 @@
+"""Option chain service: TTL-cached expiries/chains and binary-search strike picks.
+
+Each chain is stored as sorted NumPy strike arrays (plus matching premium
+arrays) per side, so the nearest strike to any target is a searchsorted
+lookup instead of a full-chain sort. pick_strikes() resolves many
+(ticker, side, moneyness) requests in one call, fetching any missing
+chains concurrently.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import metrics
+import price_store
+import scan_engine
+
+Side = namedtuple('Side', 'strikes premiums')
+Chain = namedtuple('Chain', 'ticker expiry calls puts')
+Pick = namedtuple('Pick', 'ticker side expiry strike premium')
+
+def pick_expiry(expiries):
+    """Second listed expiry (skips the same-week one), or the first if that's all there is."""
+    return expiries[1] if len(expiries) > 1 else expiries[0]
+
+
+def _side(frame):
+    frame = frame.sort_values('strike')
+    bid, ask = frame['bid'].to_numpy(dtype=float), frame['ask'].to_numpy(dtype=float)
+    last = frame['lastPrice'].to_numpy(dtype=float)
+    mid = (bid + ask) / 2
+    premiums = np.where((bid > 0) & (ask > 0), mid, last)
+    return Side(frame['strike'].to_numpy(dtype=float), premiums)
+
+
+def nearest(strikes, targets):
+    """Index of the strike closest to each target (ties go to the lower strike)."""
+    targets = np.asarray(targets, dtype=float)
+    if len(strikes) == 1:
+        return np.zeros(targets.shape, dtype=np.int64)
+    idx = np.clip(np.searchsorted(strikes, targets), 1, len(strikes) - 1)
+    lower, upper = strikes[idx - 1], strikes[idx]
+    return np.where(targets - lower <= upper - targets, idx - 1, idx)
+
+
+class OptionChainService:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._expiries = {}  # ticker -> (fetched_at, tuple of expiries)
+        self._chains = {}    # (ticker, expiry) -> (fetched_at, Chain)
+        self._lock = threading.Lock()
+
+    def _fresh(self, store, key):
+        with self._lock:
+            entry = store.get(key)
+        if entry is not None and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def expiries(self, ticker):
+        cached = self._fresh(self._expiries, ticker)
+        if cached is None:
+            with metrics.span('api.yfinance.options'):
+                cached = tuple(price_store.yfinance().Ticker(ticker).options)
+            with self._lock:
+                self._expiries[ticker] = (time.time(), cached)
+        return cached
+
+    def chain(self, ticker, expiry=None):
+        """Chain for one expiry (default: pick_expiry of the listed expiries)."""
+        expiry = expiry or pick_expiry(self.expiries(ticker))
+        cached = self._fresh(self._chains, (ticker, expiry))
+        if cached is None:
+            with metrics.span('api.yfinance.chain'):
+                opts = price_store.yfinance().Ticker(ticker).option_chain(expiry)
+            cached = Chain(ticker, expiry, _side(opts.calls), _side(opts.puts))
+            with self._lock:
+                self._chains[(ticker, expiry)] = (time.time(), cached)
+        return cached
+
+    def pick_strikes(self, requests):
+        """Nearest strikes for many requests at once.
+
+        requests: iterable of (ticker, side, spot, moneyness), e.g.
+        ('NVDA', 'call', 181.2, 1.02) for ~2% OTM. Returns {request: Pick};
+        tickers whose chain can't be fetched are left out.
+        """
+        requests = list(requests)
+        chains, _ = scan_engine.fetch_many('options', self.chain, {r[0] for r in requests})
+        by_side = {}
+        for request in requests:
+            ticker, side = request[0], request[1]
+            if ticker in chains:
+                by_side.setdefault((ticker, side), []).append(request)
+
+        picks = {}
+        for (ticker, side), group in by_side.items():
+            chain = chains[ticker]
+            book = chain.calls if side == 'call' else chain.puts
+            if not len(book.strikes):
+                continue
+            targets = np.array([spot * moneyness for _, _, spot, moneyness in group])
+            for request, i in zip(group, nearest(book.strikes, targets)):
+                picks[request] = Pick(ticker, side, chain.expiry, float(book.strikes[i]), float(book.premiums[i]))
+        return picks
@@ -0,0 +1,164 @@
+"""Local daily OHLCV store backed by SQLite.
+
+Bars are downloaded with one batched yf.download call per group of tickers
+and kept in prices.db. Later updates only ask Yahoo for bars from the last
+cached date onwards (that bar is re-fetched too, since today's bar is still
+moving during market hours).
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import metrics
+
+PRICE_DB = os.getenv('PRICE_DB', 'prices.db')
+BATCH_SIZE = 100  # tickers per yf.download call
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_lock = threading.Lock()
+yf = None  # yfinance, imported on first use (it is slow to import); option_chains shares it
+
+
+def yfinance():
+    global yf
+    if yf is None:
+        import yfinance as module
+        yf = module
+    return yf
+
+
+def _connect():
+    conn = sqlite3.connect(PRICE_DB, timeout=30)
+    conn.execute('''CREATE TABLE IF NOT EXISTS bars (ticker TEXT, date TEXT, open REAL, high REAL, low REAL, close REAL, volume REAL, PRIMARY KEY (ticker, date)) WITHOUT ROWID''')
+    # Earliest start date we have already downloaded from, per ticker (for backfills)
+    conn.execute('''CREATE TABLE IF NOT EXISTS coverage (ticker TEXT PRIMARY KEY, start TEXT)''')
+    return conn
+
+
+def _download(tickers, start):
+    """One batched Yahoo request. Returns {ticker: DataFrame of FIELDS}."""
+    with metrics.span('api.yfinance.download'):
+        df = yfinance().download(tickers, start=start, group_by='ticker', auto_adjust=True,
+                         threads=True, progress=False)
+    frames = {}
+    if df is None or df.empty:
+        return frames
+    for ticker in tickers:
+        if isinstance(df.columns, pd.MultiIndex):
+            if ticker not in df.columns.get_level_values(0):
+                continue
+            frame = df[ticker]
+        else:
+            frame = df
+        frame = frame[FIELDS].dropna(subset=['Close'])
+        if len(frame):
+            frames[ticker] = frame
+    return frames
+
+
+def update(tickers, days=31):
+    """Bring every ticker up to date, covering at least the last `days` calendar days.
+
+    Tickers are grouped by the date they need bars from, so a steady-state
+    scan turns into a single small download for the whole watchlist.
+    """
+    tickers = sorted(set(tickers))
+    start = (datetime.now() - timedelta(days=days)).date().isoformat()
+    with _lock:
+        conn = _connect()
+        try:
+            last = dict(conn.execute('SELECT ticker, MAX(date) FROM bars GROUP BY ticker'))
+            covered = dict(conn.execute('SELECT ticker, start FROM coverage'))
+            groups = {}
+            for ticker in tickers:
+                if ticker in last and covered.get(ticker, last[ticker]) <= start:
+                    since = last[ticker]
+                else:
+                    since = start  # new ticker or needs backfill
+                groups.setdefault(since, []).append(ticker)
+
+            for since, group in sorted(groups.items()):
+                for i in range(0, len(group), BATCH_SIZE):
+                    batch = group[i:i + BATCH_SIZE]
+                    frames = _download(batch, since)
+                    rows = [(ticker, ts.date().isoformat(), *map(float, bar))
+                            for ticker, frame in frames.items()
+                            for ts, bar in zip(frame.index, frame.itertuples(index=False))]
+                    conn.executemany('INSERT OR REPLACE INTO bars VALUES (?,?,?,?,?,?,?)', rows)
+                    conn.executemany('INSERT INTO coverage VALUES (?,?) ON CONFLICT(ticker) DO UPDATE SET start=MIN(start, excluded.start)',
+                                     [(ticker, since) for ticker in frames])
+                    conn.commit()
+        finally:
+            conn.close()
+
+
+def get_panel(tickers, days=31, end=None):
+    """Cached bars for several tickers in one query: {ticker: DataFrame(Open..Volume)}."""
+    tickers = sorted(set(tickers))
+    if not tickers:
+        return {}
+    start = (datetime.now() - timedelta(days=days)).date().isoformat()
+    end = end or '9999-12-31'
+    conn = _connect()
+    try:
+        df = pd.read_sql_query(
+            f"SELECT ticker, date, open, high, low, close, volume FROM bars WHERE ticker IN ({','.join('?' * len(tickers))}) "
+            "AND date >= ? AND date < ? ORDER BY ticker, date",
+            conn, params=[*tickers, start, end], parse_dates=['date'])
+    finally:
+        conn.close()
+    df.columns = ['ticker', 'date', *FIELDS]
+    return {ticker: frame.set_index('date')[FIELDS] for ticker, frame in df.groupby('ticker', sort=True)}
+
+
+def last_closes(tickers):
+    """Most recent cached close per ticker."""
+    tickers = sorted(set(tickers))
+    if not tickers:
+        return {}
+    conn = _connect()
+    try:
+        return dict(conn.execute(
+            f"SELECT b.ticker, b.close FROM bars b JOIN (SELECT ticker, MAX(date) AS date FROM bars WHERE ticker IN ({','.join('?' * len(tickers))}) GROUP BY ticker) m "
+            "ON b.ticker = m.ticker AND b.date = m.date", tickers))
+    finally:
+        conn.close()
+
+
+def last_dates(tickers):
+    """Date of the newest cached bar per ticker."""
+    tickers = sorted(set(tickers))
+    if not tickers:
+        return {}
+    conn = _connect()
+    try:
+        return dict(conn.execute(
+            f"SELECT ticker, MAX(date) FROM bars WHERE ticker IN ({','.join('?' * len(tickers))}) GROUP BY ticker", tickers))
+    finally:
+        conn.close()
+
+
+def closes_on_or_before(pairs):
+    """Last cached close on or before each (ticker, date) pair, in one batched lookup.
+
+    Returns {(ticker, date): close}; pairs with no bar at all are left out.
+    """
+    pairs = sorted(set(pairs))
+    if not pairs:
+        return {}
+    rows = []
+    conn = _connect()
+    try:
+        for i in range(0, len(pairs), 400):  # stay under SQLite's bound-variable limit
+            chunk = pairs[i:i + 400]
+            rows += conn.execute(
+                f"WITH want(ticker, date) AS (VALUES {','.join(['(?,?)'] * len(chunk))}) "
+                "SELECT w.ticker, w.date, (SELECT b.close FROM bars b WHERE b.ticker = w.ticker AND b.date <= w.date "
+                "ORDER BY b.date DESC LIMIT 1) FROM want w",
+                [v for pair in chunk for v in pair]).fetchall()
+    finally:
+        conn.close()
+    return {(ticker, date): close for ticker, date, close in rows if close is not None}
@@ -0,0 +1,66 @@
+"""Concurrent fetch stage for the scanner.
+
+Per-ticker network work (sentiment, option chains) runs on one shared,
+bounded thread pool. Each data source additionally has its own in-flight cap
+so a slow provider can't starve the others or trip its rate limits. Results
+are always handed back keyed and sorted by ticker, so callers apply signal
+decisions and DB writes on their own thread in a deterministic order.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+MAX_WORKERS = int(os.getenv('SCAN_MAX_WORKERS', '16'))
+
+# Max concurrent calls per source (on top of the shared pool size)
+SOURCE_LIMITS = {
+    'sentiment': int(os.getenv('SCAN_SENTIMENT_LIMIT', '4')),
+    'options': int(os.getenv('SCAN_OPTIONS_LIMIT', '4')),
+}
+
+_semaphores = {source: threading.BoundedSemaphore(limit) for source, limit in SOURCE_LIMITS.items()}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Shared worker pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='scan')
+        return _pool
+
+
+def _limited(source, fn, ticker):
+    with _semaphores[source], metrics.span(f'ticker.{source}', ticker=ticker):
+        return fn(ticker)
+
+
+def fetch_many(source, fn, tickers):
+    """Run fn(ticker) for every ticker concurrently, capped by the source's limit.
+
+    Returns (results, errors): two dicts keyed by ticker, both in sorted ticker
+    order. A failing ticker lands in errors and never affects the others.
+    """
+    pool = get_pool()
+    futures = {ticker: pool.submit(_limited, source, fn, ticker) for ticker in sorted(set(tickers))}
+    results, errors = {}, {}
+    for ticker, future in futures.items():
+        try:
+            results[ticker] = future.result()
+        except Exception as e:
+            errors[ticker] = e
+            metrics.error(source, e)
+    return results, errors
+
+
+def shutdown():
+    """Stop the shared pool (used on process exit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,174 @@
+"""Standalone scanner worker.
+
+    python scanner_service.py            # run until SIGTERM/SIGINT
+    python scanner_service.py --once     # single pass (cron / debugging)
+
+Exactly one scanner runs per host: the worker holds an exclusive lock on
+scanner.lock for its lifetime, so the embedded fallback in app.py and any
+second worker stand down. Passes are spaced by SCAN_INTERVAL seconds (plus
+up to SCAN_JITTER of random jitter), never overlap, and slow down to
+SCAN_OFF_HOURS_INTERVAL outside US market hours. During market hours a
+pass comes sooner when the ticker index has hot tickers due (never closer
+than SCAN_MIN_INTERVAL); such a pass only evaluates the tickers that are due.
+With --metrics-port (or METRICS_PORT) the worker serves Prometheus text at
+/metrics.
+"""
+import argparse
+import fcntl
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime, time as dtime
+from zoneinfo import ZoneInfo
+
+log = logging.getLogger('benji.scanner')
+
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 0)
+LOCK_FILE = os.getenv('SCANNER_LOCK', 'scanner.lock')
+
+
+def market_open(now=None):
+    """Regular US session, Mon-Fri 9:30-16:00 ET (exchange holidays not modelled)."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+class Scheduler:
+    def __init__(self, job, interval=540, jitter=30, off_hours_interval=3600, market_hours_only=True,
+                 next_due=None, min_interval=120):
+        self.job = job
+        self.next_due = next_due  # () -> seconds until the next ticker is due, or None
+        self.min_interval = min_interval
+        self.interval = interval
+        self.jitter = jitter
+        self.off_hours_interval = off_hours_interval
+        self.market_hours_only = market_hours_only
+        self.stopping = threading.Event()
+        self._running = threading.Lock()  # held for the duration of a pass
+
+    @classmethod
+    def from_env(cls, job, next_due=None):
+        return cls(job,
+                   interval=float(os.getenv('SCAN_INTERVAL', '540')),
+                   jitter=float(os.getenv('SCAN_JITTER', '30')),
+                   off_hours_interval=float(os.getenv('SCAN_OFF_HOURS_INTERVAL', '3600')),
+                   market_hours_only=os.getenv('SCAN_MARKET_HOURS_ONLY', '1') != '0',
+                   next_due=next_due,
+                   min_interval=float(os.getenv('SCAN_MIN_INTERVAL', '120')))
+
+    def run_once(self):
+        """Run one pass unless one is already in progress. Returns False if skipped."""
+        if not self._running.acquire(blocking=False):
+            log.warning("previous scan still running; skipping")
+            return False
+        try:
+            started = time.monotonic()
+            self.job()
+            log.info("scan finished in %.1fs", time.monotonic() - started)
+        except Exception:
+            log.exception("scan failed")
+        finally:
+            self._running.release()
+        return True
+
+    def next_delay(self, elapsed):
+        active = market_open() or not self.market_hours_only
+        base = self.interval if active else self.off_hours_interval
+        delay = max(0.0, base - elapsed + random.uniform(-self.jitter, self.jitter))
+        due = self.next_due() if (active and self.next_due is not None) else None
+        if due is not None:
+            delay = min(delay, max(self.min_interval - elapsed, due, 0.0))  # hot tickers: come back sooner
+        return delay
+
+    def run(self):
+        # Small random start offset so restarts across hosts don't align
+        self.stopping.wait(random.uniform(0, self.jitter))
+        while not self.stopping.is_set():
+            started = time.monotonic()
+            self.run_once()
+            self.stopping.wait(self.next_delay(time.monotonic() - started))
+
+    def stop(self):
+        self.stopping.set()
+        # wait for an in-flight pass to finish
+        with self._running:
+            pass
+
+
+def acquire_host_lock(path=LOCK_FILE):
+    """Exclusive, non-blocking lock file. Returns the open handle, or None if held elsewhere."""
+    handle = open(path, 'a+')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+def start_background():
+    """Start the scheduler on a daemon thread if no other scanner holds the lock (used by app.py)."""
+    lock = acquire_host_lock()
+    if lock is None:
+        return None
+
+    def job():
+        import scanner  # heavy (numpy, yfinance, VADER...): imported on the scanner thread, not the UI's
+        scanner.analyze_and_signal()
+
+    def next_due():
+        import scanner
+        return scanner.get_ticker_index().next_due()
+
+    scheduler = Scheduler.from_env(job, next_due)
+    scheduler.lock = lock  # keep the handle (and the lock) alive with the scheduler
+    threading.Thread(target=scheduler.run, daemon=True, name='scanner').start()
+    return scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benji Bot scanner worker.")
+    parser.add_argument('--once', action='store_true', help="run a single pass and exit")
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('METRICS_PORT') or 0),
+                        help="serve Prometheus metrics on this port (0 = off)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    lock = acquire_host_lock()
+    if lock is None:
+        log.error("another scanner already holds %s", LOCK_FILE)
+        return 1
+
+    import scanner
+    if args.metrics_port:
+        import metrics
+        metrics.serve(args.metrics_port)
+        log.info("metrics on :%d/metrics", args.metrics_port)
+    scheduler = Scheduler.from_env(scanner.analyze_and_signal, lambda: scanner.get_ticker_index().next_due())
+    try:
+        if args.once:
+            scheduler.run_once()
+        else:
+            def handle_signal(signum, frame):
+                log.info("signal %s: finishing current pass and shutting down", signum)
+                scheduler.stopping.set()
+            signal.signal(signal.SIGTERM, handle_signal)
+            signal.signal(signal.SIGINT, handle_signal)
+            scheduler.run()
+    finally:
+        scanner.shutdown()
+        lock.close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+"""Batch scoring stage for the scanner.
+
+All watched tickers are scored in one pass: one vectorized predict_proba
+call when a model is loaded, or the original hand formula as a fallback
+(BENJI_SCORER=formula forces it).
+
+The model is trained on a bullish label only (5-bar move above +3%, see
+features.TARGET), so its POP is the probability of an up-move and every
+model pick is a call. The formula is direction-agnostic and follows the
+sign of momentum, as it always has.
+"""
+import os
+import numpy as np
+
+SCORER = os.getenv('BENJI_SCORER', 'model')  # 'model' or 'formula'
+POP_THRESHOLD = float(os.getenv('POP_THRESHOLD', '72'))
+
+
+def formula_pop(momentum, sentiment):
+    """Original hand-tuned estimate; works elementwise on arrays too."""
+    return 50 + np.asarray(momentum) * 220 + np.asarray(sentiment) * 50  # Boosted sentiment weight for hype
+
+
+def score(model, X, momentum, sentiment, scorer=None):
+    """POP estimates (0-100 scale) for every row of X.
+
+    Returns (pops, used) where used is 'model' or 'formula'. A missing model
+    or one that rejects the feature matrix falls back to the formula.
+    """
+    scorer = scorer or SCORER
+    if scorer == 'model' and model is not None and len(X):
+        try:
+            return model.predict_proba(X)[:, 1] * 100, 'model'
+        except (ValueError, AttributeError, IndexError):
+            pass
+    return formula_pop(momentum, sentiment), 'formula'
+
+
+def sides(momentum, used):
+    """'call'/'put' per row for pops scored by `used` ('model' or 'formula')."""
+    momentum = np.asarray(momentum)
+    if used == 'model':
+        return np.full(momentum.shape, 'call')
+    return np.where(momentum > 0, 'call', 'put')
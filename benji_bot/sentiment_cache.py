@@ -0,0 +1,108 @@
+"""Thread-safe TTL cache for sentiment scores.
+
+Entries are keyed by (source, ticker) so the X, Finnhub and Alpha Vantage
+scores for a ticker never overwrite each other. Each source has its own TTL,
+the cache is LRU-bounded, and persistence is an append-only JSON-lines log
+(one line per put) that is compacted on load when it grows too large.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_FILE = 'sentiment_cache.jsonl'
+
+# Seconds each source's score stays fresh
+TTLS = {
+    'x': 3600,             # 1h
+    'finnhub': 1800,       # 30min
+    'alphavantage': 86400, # 24h
+}
+
+
+class SentimentCache:
+    def __init__(self, path=CACHE_FILE, ttls=TTLS, max_entries=5000, compact_factor=4):
+        self.path = path
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self.compact_factor = compact_factor
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # (source, ticker) -> (score, stored_at)
+        self._lock = threading.Lock()
+        self._log = None
+        self._log_lines = 0
+        self._load()
+
+    def get(self, source, ticker):
+        """Fresh cached score, or None."""
+        key = (source, ticker)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.time() - entry[1] < self.ttls.get(source, 0):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, source, ticker, score):
+        entry = (float(score), time.time())
+        with self._lock:
+            self._store((source, ticker), entry)
+            self._append(source, ticker, entry)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    # --- internals (call with self._lock held) ---
+    def _store(self, key, entry):
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def _append(self, source, ticker, entry):
+        if self._log is None:
+            self._log = open(self.path, 'a', encoding='utf-8')
+        self._log.write(json.dumps([source, ticker, entry[0], entry[1]]) + '\n')
+        self._log.flush()
+        self._log_lines += 1
+        if self._log_lines > self.compact_factor * max(len(self._data), 1) and self._log_lines > 1000:
+            self._compact()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        now = time.time()
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                self._log_lines += 1
+                try:
+                    source, ticker, score, stored_at = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                if now - stored_at < self.ttls.get(source, 0):
+                    self._store((source, ticker), (score, stored_at))
+        if self._log_lines > len(self._data):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the log with only the live entries (atomic rename)."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for (source, ticker), (score, stored_at) in self._data.items():
+                f.write(json.dumps([source, ticker, score, stored_at]) + '\n')
+        os.replace(tmp, self.path)
+        self._log_lines = len(self._data)
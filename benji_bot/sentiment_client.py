@@ -0,0 +1,192 @@
+"""Pooled, rate-limited HTTP client for the news sentiment providers.
+
+One requests.Session (keep-alive connection pool) is shared by every call.
+Each provider has a token bucket for its per-minute limit plus a daily quota,
+and concurrent lookups for the same ticker share one in-flight request.
+Base URLs come from FINNHUB_URL / ALPHAVANTAGE_URL so the client can be
+pointed at a local stub server.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+PROVIDERS = {
+    'finnhub': {
+        'url': os.getenv('FINNHUB_URL', 'https://finnhub.io/api/v1'),
+        'per_minute': 60,
+        'daily_quota': None,
+        'timeout': 5,
+    },
+    'alphavantage': {
+        'url': os.getenv('ALPHAVANTAGE_URL', 'https://www.alphavantage.co'),
+        'per_minute': 5,
+        'daily_quota': 25,
+        'timeout': 10,
+    },
+}
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/sec, holds at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait):
+        """Take a token, waiting up to max_wait seconds. Returns False on timeout."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class DailyQuota:
+    def __init__(self, limit):
+        self.limit = limit
+        self.day = date.today()
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if date.today() != self.day:
+                self.day, self.used = date.today(), 0
+            if self.limit is not None and self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+
+class SentimentClient:
+    def __init__(self, providers=PROVIDERS, max_workers=8, max_wait=30, finnhub_token=None, alphavantage_key=None):
+        self.providers = providers
+        self.max_wait = max_wait  # longest we queue behind the rate limiter before falling back
+        self.finnhub_token = finnhub_token or os.getenv('FINNHUB_TOKEN', 'demo')
+        self.alphavantage_key = alphavantage_key or os.getenv('ALPHAVANTAGE_KEY', 'demo')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(providers), pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.buckets = {name: TokenBucket(p['per_minute'] / 60.0, p['per_minute']) for name, p in providers.items()}
+        self.quotas = {name: DailyQuota(p['daily_quota']) for name, p in providers.items()}
+        self.counters = Counter()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sentiment')
+
+    # --- public API: each returns a score, or None when the caller should fall back ---
+    def finnhub(self, ticker):
+        return self._coalesced('finnhub', ticker, lambda: self._fetch_finnhub(ticker))
+
+    def alphavantage(self, tickers=('NVDA', 'TSLA')):
+        key = ','.join(tickers)
+        return self._coalesced('alphavantage', key, lambda: self._fetch_alphavantage(key))
+
+    def finnhub_many(self, tickers):
+        """Finnhub scores for many tickers concurrently: {ticker: score or None}."""
+        futures = {t: self._pool.submit(self.finnhub, t) for t in sorted(set(tickers))}
+        return {t: f.result() for t, f in futures.items()}
+
+    def stats(self):
+        with self._inflight_lock:
+            stats = dict(self.counters)
+        for name, quota in self.quotas.items():
+            stats[f'{name}_quota_used'] = quota.used
+        return stats
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.session.close()
+
+    # --- internals ---
+    def _count(self, key):
+        with self._inflight_lock:
+            self.counters[key] += 1
+
+    def _coalesced(self, provider, key, fetch):
+        """Run fetch once per (provider, key) at a time; duplicate callers wait on it."""
+        with self._inflight_lock:
+            future = self._inflight.get((provider, key))
+            owner = future is None
+            if owner:
+                future = self._inflight[(provider, key)] = Future()
+            else:
+                self.counters[f'{provider}_coalesced'] += 1
+        if owner:
+            try:
+                future.set_result(self._call(provider, fetch))
+            except Exception as e:
+                future.set_exception(e)  # never leave coalesced waiters blocked
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[(provider, key)]
+        return future.result()
+
+    def _call(self, provider, fetch):
+        if not self.quotas[provider].take():
+            self._count(f'{provider}_quota_exhausted')
+            self._count(f'{provider}_fallback')
+            return None
+        if not self.buckets[provider].acquire(self.max_wait):
+            self._count(f'{provider}_rate_limited')
+            self._count(f'{provider}_fallback')
+            return None
+        self._count(f'{provider}_requests')
+        try:
+            with metrics.span(f'api.{provider}'):
+                return fetch()
+        except QuotaExhausted as e:
+            self._count(f'{provider}_quota_exhausted')
+            metrics.error(provider, e)
+        except (requests.RequestException, ValueError) as e:
+            self._count(f'{provider}_errors')
+            metrics.error(provider, e)
+        except (KeyError, TypeError, AttributeError) as e:  # malformed payload, e.g. {"sentiment": null}
+            self._count(f'{provider}_parse_errors')
+            metrics.error(provider, e)
+        self._count(f'{provider}_fallback')
+        return None
+
+    def _get(self, provider, path, params):
+        p = self.providers[provider]
+        resp = self.session.get(p['url'] + path, params=params, timeout=p['timeout'])
+        if resp.status_code == 429:
+            raise QuotaExhausted(provider)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _fetch_finnhub(self, ticker):
+        data = self._get('finnhub', '/news-sentiment', {'symbol': ticker, 'token': self.finnhub_token})
+        return data.get('sentiment', {}).get('score', 0.0) if 'sentiment' in data else 0.5
+
+    def _fetch_alphavantage(self, tickers):
+        data = self._get('alphavantage', '/query', {'function': 'NEWS_SENTIMENT', 'tickers': tickers, 'apikey': self.alphavantage_key})
+        if 'Note' in data or 'Information' in data:  # Alpha Vantage reports quota limits in-band
+            raise QuotaExhausted('alphavantage')
+        scores = [item.get('overall_sentiment_score', 0.5) for item in data.get('feed', [])[:10]]
+        return sum(scores) / len(scores) if scores else 0.5
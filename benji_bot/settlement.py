@@ -0,0 +1,78 @@
+"""Settlement of expired signals at real underlying prices.
+
+All signals whose expiry date has passed are settled together: their
+closes on expiry come from the price store in one batched lookup, the
+intrinsic-value P&L of each $100 play is computed as one NumPy expression,
+and the signals rows and active_signals cleanup are written in a single
+transaction (AI totals follow from the pnl_rollups trigger on signals).
+"""
+from datetime import date, datetime
+
+import numpy as np
+
+import metrics
+import price_store
+import pricing
+import storage
+
+FALLBACK_VOL = 0.5  # for legacy signals recorded before entry premiums were stored
+
+_EXPIRED_SQL = ('SELECT ticker, direction, strike, expiry, entry_time, pop, explanation, sentiment, premium '
+                'FROM active_signals WHERE expiry < ? ORDER BY expiry, ticker')
+
+
+def settle_expired(today=None, download=True):
+    """Settle every signal that expired before `today`. Returns [(ticker, pnl)] for the settled rows.
+
+    A signal is settled once the close on its expiry date is final, i.e. the
+    day after expiry, and the price store has a bar dated on or after expiry
+    (so a failed download or a gap never settles at a stale close). Signals
+    whose expiry close isn't available yet stay active and are retried on
+    the next pass.
+    """
+    today = (today or date.today()).isoformat()
+    expired = storage.reader().execute(_EXPIRED_SQL, (today,)).fetchall()
+    if not expired:
+        return []
+
+    tickers = {row[0] for row in expired}
+    if download:
+        oldest = min(row[4][:10] for row in expired)
+        days = (date.today() - date.fromisoformat(oldest)).days + 7
+        try:
+            price_store.update(tickers, days=days)
+        except Exception as e:
+            metrics.error('settlement.prices', e)  # settle what the cache already covers
+    closes = price_store.closes_on_or_before(
+        [(row[0], row[3]) for row in expired] + [(row[0], row[4][:10]) for row in expired])
+
+    newest = price_store.last_dates(tickers)
+    ready = [row for row in expired if (row[0], row[3]) in closes and newest.get(row[0], '') >= row[3]]
+    if not ready:
+        return []
+
+    strike = np.array([row[2] for row in ready], dtype=float)
+    is_call = np.array([row[1] == 'call' for row in ready])
+    settle_close = np.array([closes[(row[0], row[3])] for row in ready], dtype=float)
+    premium = np.array([row[8] if row[8] else np.nan for row in ready], dtype=float)
+
+    # Legacy rows without a recorded premium: Black-Scholes estimate at entry
+    missing = np.isnan(premium)
+    if missing.any():
+        entry_close = np.array([closes.get((row[0], row[4][:10]), row[2]) for row in ready], dtype=float)
+        years = np.array([max((date.fromisoformat(row[3]) - date.fromisoformat(row[4][:10])).days, 1) / 365
+                          for row in ready])
+        premium[missing] = pricing.bs_premium(entry_close, strike, FALLBACK_VOL, years, is_call)[missing]
+
+    pnl = np.round(pricing.play_pnl(premium, strike, settle_close, is_call), 2)
+
+    now = datetime.now().isoformat()
+    signal_rows = [(now, row[0], row[1], row[2], row[3], float(p), row[5], row[6], row[7], float(prem), float(close))
+                   for row, p, prem, close in zip(ready, pnl, premium, settle_close)]
+
+    def write(conn):
+        conn.executemany("INSERT INTO signals (username,timestamp,ticker,direction,strike,expiry,pnl,pop,explanation,sentiment,premium,settle_close) "
+                         "VALUES ('all',?,?,?,?,?,?,?,?,?,?,?)", signal_rows)
+        conn.executemany('DELETE FROM active_signals WHERE ticker=? AND expiry=?', [(row[0], row[3]) for row in ready])
+    storage.transaction(write)
+    return [(row[0], float(p)) for row, p in zip(ready, pnl)]
@@ -0,0 +1,135 @@
+"""Sharded scan evaluation across worker processes.
+
+The watched tickers are split across SCAN_SHARDS worker processes by
+consistent hashing, so each ticker always lands on the same worker (and its
+warm sentiment cache) and resizing the pool only moves ~1/N of the tickers.
+Each worker runs scanner.evaluate() on its shard: bars from prices.db,
+sentiment, features and model scoring, all CPU work outside the
+coordinator's GIL. The coordinator downloads bars once beforehand, then
+merges the candidates and does every DB write and alert itself.
+
+Workers share the provider rate limits: each gets 1/N of the per-minute
+and daily budgets, and its own sentiment cache file.
+"""
+import bisect
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+
+REPLICAS = 100  # virtual nodes per shard on the ring
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    def __init__(self, shards, replicas=REPLICAS):
+        points = sorted((_hash(f'shard-{shard}:{i}'), shard) for shard in range(shards) for i in range(replicas))
+        self.shards = shards
+        self._keys = [key for key, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def shard_for(self, ticker):
+        return self._owners[bisect.bisect(self._keys, _hash(ticker)) % len(self._keys)]
+
+    def partition(self, tickers):
+        """Sorted ticker list per shard."""
+        parts = [[] for _ in range(self.shards)]
+        for ticker in sorted(set(tickers)):
+            parts[self.shard_for(ticker)].append(ticker)
+        return parts
+
+
+# === WORKER SIDE ===
+def _init_worker(shard, shards):
+    import scanner
+    from sentiment_cache import CACHE_FILE, SentimentCache
+    from sentiment_client import PROVIDERS, SentimentClient
+    from vader_service import VaderService
+
+    providers = {name: dict(p, per_minute=max(1, p['per_minute'] // shards),
+                            daily_quota=p['daily_quota'] and max(1, p['daily_quota'] // shards))
+                 for name, p in PROVIDERS.items()}
+    with scanner._resources_lock:
+        scanner._resources.update({
+            'sentiment_cache': SentimentCache(CACHE_FILE.replace('.jsonl', f'.shard{shard}.jsonl')),
+            'sentiment_client': SentimentClient(providers=providers),
+            'vader': VaderService(processes=1),  # the shard is already one process per core
+        })
+
+
+def _evaluate(tickers):
+    import scanner
+    with metrics.scan() as record:
+        result = scanner.evaluate(tickers)
+    return result, record
+
+
+# === COORDINATOR SIDE ===
+class ShardPool:
+    """One single-process executor per shard, so shard i always runs on worker i."""
+
+    def __init__(self, shards):
+        # spawn, not fork: the coordinator has live threads (DB writer, notifier, fetch pool)
+        self._context = multiprocessing.get_context('spawn')
+        self.ring = HashRing(shards)
+        self._executors = [self._start(shard) for shard in range(shards)]
+
+    def _start(self, shard):
+        return ProcessPoolExecutor(max_workers=1, mp_context=self._context,
+                                   initializer=_init_worker, initargs=(shard, self.ring.shards))
+
+    def evaluate(self, tickers):
+        """scanner.evaluate() across all shards, merged: (candidates, spots, scores)."""
+        futures = [(shard, self._executors[shard].submit(_evaluate, part))
+                   for shard, part in enumerate(self.ring.partition(tickers)) if part]
+        candidates, spots, scores = [], {}, {}
+        for shard, future in futures:
+            try:
+                (part_candidates, part_spots, part_scores), record = future.result()
+            except BrokenProcessPool as e:
+                metrics.error('shard', e)
+                self._executors[shard] = self._start(shard)  # worker died; replace it for the next pass
+                continue
+            except Exception as e:
+                metrics.error('shard', e)
+                continue
+            candidates.extend(part_candidates)
+            spots.update(part_spots)
+            scores.update(part_scores)
+            metrics.absorb(record)
+        candidates.sort()
+        return candidates, spots, scores
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(shards):
+    """Process-wide shard pool (rebuilt if the shard count changes)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.ring.shards != shards:
+            _pool.close()
+            _pool = None
+        if _pool is None:
+            _pool = ShardPool(shards)
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,277 @@
+"""SQLite storage layer: WAL mode, per-thread readers, one batching writer.
+
+Every thread (the scanner, each Streamlit session's script thread) gets its
+own read connection via reader(). All writes are funnelled through a single
+writer thread that groups whatever is queued into one transaction, each
+job in its own savepoint so one bad job can't roll back the others.
+Schema changes live in MIGRATIONS and are applied in order, tracked with
+PRAGMA user_version.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+DB_PATH = os.getenv('BENJI_DB', 'benji.db')
+
+PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',  # safe with WAL, far fewer fsyncs
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',   # ~20MB page cache per connection
+]
+
+def iso_week(ts):
+    """SQL for the ISO week ('YYYY-Www', as date.isocalendar()) of a timestamp expression."""
+    thursday = f"{ts}, 'weekday 0', '-3 days'"  # the Thursday of its Monday-Sunday week decides the year
+    return f"strftime('%Y', {thursday}) || '-W' || printf('%02d', (strftime('%j', {thursday}) - 1) / 7 + 1)"
+
+
+# (version, statements) — append only; never edit a released migration
+MIGRATIONS = [
+    (1, [
+        '''CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, email TEXT, telegram_chat_id TEXT, ai_total REAL DEFAULT 0, you_total REAL DEFAULT 0, join_date TEXT)''',
+        '''CREATE TABLE IF NOT EXISTS signals (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, timestamp TEXT, ticker TEXT, direction TEXT, strike REAL, expiry TEXT, pnl REAL DEFAULT 0, user_confirmed INTEGER DEFAULT 0, pop REAL, explanation TEXT)''',
+        '''CREATE TABLE IF NOT EXISTS preferences (username TEXT, ticker TEXT, enabled INTEGER DEFAULT 1, PRIMARY KEY (username, ticker))''',
+        '''CREATE TABLE IF NOT EXISTS active_signals (ticker TEXT PRIMARY KEY, direction TEXT, strike REAL, expiry TEXT, entry_time TEXT, pop REAL, explanation TEXT)''',
+        'CREATE INDEX IF NOT EXISTS idx_preferences_ticker_enabled ON preferences (ticker, enabled)',
+        'CREATE INDEX IF NOT EXISTS idx_signals_timestamp ON signals (timestamp)',
+    ]),
+    (2, [
+        # sentiment snapshot taken when the signal fired (read by the Explain panel)
+        'ALTER TABLE active_signals ADD COLUMN sentiment REAL',
+        'ALTER TABLE signals ADD COLUMN sentiment REAL',
+    ]),
+    (3, [
+        # entry premium per contract and the underlying close used to settle
+        'ALTER TABLE active_signals ADD COLUMN premium REAL',
+        'ALTER TABLE signals ADD COLUMN premium REAL',
+        'ALTER TABLE signals ADD COLUMN settle_close REAL',
+        'CREATE INDEX IF NOT EXISTS idx_active_signals_expiry ON active_signals (expiry)',
+    ]),
+    (4, [
+        # one row per scan pass: per-phase seconds and slowest tickers as JSON (admin panel)
+        '''CREATE TABLE IF NOT EXISTS scan_runs (id INTEGER PRIMARY KEY AUTOINCREMENT, started TEXT, duration REAL, scanned INTEGER, signals INTEGER, errors INTEGER, phases TEXT, slowest TEXT)''',
+    ]),
+    (5, [
+        # per-user ledger of confirmed plays (signals.user_confirmed was global)
+        '''CREATE TABLE IF NOT EXISTS confirmations (username TEXT, signal_id INTEGER, pnl REAL, confirmed_at TEXT, PRIMARY KEY (username, signal_id)) WITHOUT ROWID''',
+        # P&L rollups, kept current by the triggers below. scope: 'ai' (key ''), 'ticker' or 'user';
+        # period: 'day' (bucket YYYY-MM-DD), 'week' (YYYY-Www; ISO weeks since migration 7) or 'all' (bucket '')
+        '''CREATE TABLE IF NOT EXISTS pnl_rollups (scope TEXT, key TEXT, period TEXT, bucket TEXT, plays INTEGER, wins INTEGER, pnl REAL, PRIMARY KEY (scope, key, period, bucket)) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_pnl_rollups_board ON pnl_rollups (scope, period, bucket, pnl)',
+        '''CREATE TRIGGER IF NOT EXISTS trg_signals_rollup AFTER INSERT ON signals BEGIN
+           INSERT INTO pnl_rollups (scope, key, period, bucket, plays, wins, pnl) VALUES
+           ('ai', '', 'day', date(NEW.timestamp), 1, NEW.pnl > 0, NEW.pnl),
+           ('ai', '', 'week', strftime('%Y-W%W', NEW.timestamp), 1, NEW.pnl > 0, NEW.pnl),
+           ('ai', '', 'all', '', 1, NEW.pnl > 0, NEW.pnl),
+           ('ticker', NEW.ticker, 'day', date(NEW.timestamp), 1, NEW.pnl > 0, NEW.pnl),
+           ('ticker', NEW.ticker, 'week', strftime('%Y-W%W', NEW.timestamp), 1, NEW.pnl > 0, NEW.pnl),
+           ('ticker', NEW.ticker, 'all', '', 1, NEW.pnl > 0, NEW.pnl)
+           ON CONFLICT (scope, key, period, bucket) DO UPDATE SET
+           plays = plays + excluded.plays, wins = wins + excluded.wins, pnl = pnl + excluded.pnl;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_confirmations_rollup AFTER INSERT ON confirmations BEGIN
+           INSERT INTO pnl_rollups (scope, key, period, bucket, plays, wins, pnl)
+           SELECT 'user', NEW.username, period, bucket, 1, NEW.pnl > 0, NEW.pnl FROM (
+               SELECT 'day' AS period, date(timestamp) AS bucket FROM signals WHERE id = NEW.signal_id
+               UNION ALL SELECT 'week', strftime('%Y-W%W', timestamp) FROM signals WHERE id = NEW.signal_id
+               UNION ALL SELECT 'all', '')
+           WHERE true
+           ON CONFLICT (scope, key, period, bucket) DO UPDATE SET
+           plays = plays + excluded.plays, wins = wins + excluded.wins, pnl = pnl + excluded.pnl;
+           UPDATE users SET you_total = you_total + NEW.pnl WHERE username = NEW.username;
+           END''',
+        # backfill from history; AI totals become global minus the total when the user joined
+        '''INSERT INTO pnl_rollups (scope, key, period, bucket, plays, wins, pnl)
+           SELECT 'ai', '', 'day', date(timestamp), COUNT(*), SUM(pnl > 0), SUM(pnl) FROM signals GROUP BY 2, 3, 4
+           UNION ALL SELECT 'ai', '', 'week', strftime('%Y-W%W', timestamp), COUNT(*), SUM(pnl > 0), SUM(pnl) FROM signals GROUP BY 2, 3, 4
+           UNION ALL SELECT 'ai', '', 'all', '', COUNT(*), SUM(pnl > 0), SUM(pnl) FROM signals GROUP BY 2, 3, 4
+           UNION ALL SELECT 'ticker', ticker, 'day', date(timestamp), COUNT(*), SUM(pnl > 0), SUM(pnl) FROM signals GROUP BY 2, 3, 4
+           UNION ALL SELECT 'ticker', ticker, 'week', strftime('%Y-W%W', timestamp), COUNT(*), SUM(pnl > 0), SUM(pnl) FROM signals GROUP BY 2, 3, 4
+           UNION ALL SELECT 'ticker', ticker, 'all', '', COUNT(*), SUM(pnl > 0), SUM(pnl) FROM signals GROUP BY 2, 3, 4''',
+        # confirmations made before the ledger can't be attributed to a day; carry the totals forward
+        '''INSERT INTO pnl_rollups (scope, key, period, bucket, plays, wins, pnl)
+           SELECT 'user', username, 'all', '', 0, 0, you_total FROM users WHERE you_total != 0''',
+        'ALTER TABLE users ADD COLUMN ai_base REAL DEFAULT 0',
+        '''UPDATE users SET ai_base = COALESCE((SELECT pnl FROM pnl_rollups WHERE scope = 'ai' AND key = '' AND period = 'all' AND bucket = ''), 0) - COALESCE(ai_total, 0)''',
+    ]),
+    (6, [
+        # scanner's per-ticker schedule (ticker_state.py); times are epoch seconds
+        '''CREATE TABLE IF NOT EXISTS ticker_state (ticker TEXT PRIMARY KEY, last_eval REAL, last_pop REAL, last_close REAL, interval REAL, next_eval REAL, cooldown_until REAL) WITHOUT ROWID''',
+    ]),
+    (7, [
+        # week buckets become ISO weeks: %W counted weeks from Jan 1 and split the week spanning New Year
+        'DROP TRIGGER IF EXISTS trg_signals_rollup',
+        f'''CREATE TRIGGER trg_signals_rollup AFTER INSERT ON signals BEGIN
+           INSERT INTO pnl_rollups (scope, key, period, bucket, plays, wins, pnl) VALUES
+           ('ai', '', 'day', date(NEW.timestamp), 1, NEW.pnl > 0, NEW.pnl),
+           ('ai', '', 'week', {iso_week('NEW.timestamp')}, 1, NEW.pnl > 0, NEW.pnl),
+           ('ai', '', 'all', '', 1, NEW.pnl > 0, NEW.pnl),
+           ('ticker', NEW.ticker, 'day', date(NEW.timestamp), 1, NEW.pnl > 0, NEW.pnl),
+           ('ticker', NEW.ticker, 'week', {iso_week('NEW.timestamp')}, 1, NEW.pnl > 0, NEW.pnl),
+           ('ticker', NEW.ticker, 'all', '', 1, NEW.pnl > 0, NEW.pnl)
+           ON CONFLICT (scope, key, period, bucket) DO UPDATE SET
+           plays = plays + excluded.plays, wins = wins + excluded.wins, pnl = pnl + excluded.pnl;
+           END''',
+        'DROP TRIGGER IF EXISTS trg_confirmations_rollup',
+        f'''CREATE TRIGGER trg_confirmations_rollup AFTER INSERT ON confirmations BEGIN
+           INSERT INTO pnl_rollups (scope, key, period, bucket, plays, wins, pnl)
+           SELECT 'user', NEW.username, period, bucket, 1, NEW.pnl > 0, NEW.pnl FROM (
+               SELECT 'day' AS period, date(timestamp) AS bucket FROM signals WHERE id = NEW.signal_id
+               UNION ALL SELECT 'week', {iso_week('timestamp')} FROM signals WHERE id = NEW.signal_id
+               UNION ALL SELECT 'all', '')
+           WHERE true
+           ON CONFLICT (scope, key, period, bucket) DO UPDATE SET
+           plays = plays + excluded.plays, wins = wins + excluded.wins, pnl = pnl + excluded.pnl;
+           UPDATE users SET you_total = you_total + NEW.pnl WHERE username = NEW.username;
+           END''',
+        "DELETE FROM pnl_rollups WHERE period = 'week'",
+        f'''INSERT INTO pnl_rollups (scope, key, period, bucket, plays, wins, pnl)
+           SELECT 'ai', '', 'week', {iso_week('timestamp')}, COUNT(*), SUM(pnl > 0), SUM(pnl) FROM signals GROUP BY 2, 3, 4
+           UNION ALL SELECT 'ticker', ticker, 'week', {iso_week('timestamp')}, COUNT(*), SUM(pnl > 0), SUM(pnl) FROM signals GROUP BY 2, 3, 4
+           UNION ALL SELECT 'user', c.username, 'week', {iso_week('s.timestamp')}, COUNT(*), SUM(c.pnl > 0), SUM(c.pnl)
+           FROM confirmations c JOIN signals s ON s.id = c.signal_id GROUP BY 2, 3, 4''',
+    ]),
+]
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or DB_PATH, timeout=5, check_same_thread=False, isolation_level=None)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def migrate(conn):
+    """Apply every migration newer than the database's user_version.
+
+    The version is re-read under the write lock, so when several processes
+    open the database at once only the first applies each migration.
+    """
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+    for version, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            current = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version > current:
+                for sql in statements:
+                    conn.execute(sql)
+                conn.execute(f'PRAGMA user_version={version}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+# === READS ===
+_local = threading.local()
+
+
+def reader():
+    """This thread's read connection (autocommit, so reads never hold a snapshot open)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = _local.conn = connect()
+        conn.execute('PRAGMA query_only=ON')
+    return conn
+
+
+# === WRITES ===
+class Writer:
+    def __init__(self, path=None, max_batch=500):
+        self.path = path
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._conn = connect(path)
+        migrate(self._conn)
+        self._thread = threading.Thread(target=self._run, daemon=True, name='db-writer')
+        self._thread.start()
+
+    def submit(self, fn):
+        """Queue fn(conn) to run inside the next write transaction. Returns a Future."""
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def execute(self, sql, params=()):
+        return self.submit(lambda conn: conn.execute(sql, params).rowcount)
+
+    def executemany(self, sql, seq):
+        rows = list(seq)
+        return self.submit(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._conn.close()
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < self.max_batch:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in jobs
+            jobs = [job for job in jobs if job is not None]
+            if jobs:
+                self._commit(jobs)
+            if stop:
+                return
+
+    def _commit(self, jobs):
+        conn = self._conn
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, future in jobs:
+                conn.execute('SAVEPOINT job')
+                try:
+                    results.append((future, fn(conn), None))
+                    conn.execute('RELEASE job')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job')
+                    conn.execute('RELEASE job')
+                    results.append((future, None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for fn, future in jobs:
+                future.set_exception(e)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def writer():
+    """Process-wide writer (runs migrations on first use)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = Writer()
+        return _writer
+
+
+def write(sql, params=()):
+    """Queue one statement and wait for its transaction to commit."""
+    return writer().execute(sql, params).result()
+
+
+def transaction(fn):
+    """Run fn(conn) atomically on the writer thread and return its result."""
+    return writer().submit(fn).result()
@@ -0,0 +1,293 @@
+"""Event-driven signal evaluation on streaming quotes.
+
+Quotes arrive from a pluggable QuoteFeed. Each ticker keeps its recent
+daily closes/volumes in fixed-size NumPy ring buffers with running sums,
+so momentum, volatility and volume surge update in O(1) per quote: a quote
+for the current day revises the live bar, a quote for a new day appends
+one. Every update is scored like the scanner does (scoring.score: the model
+when one is loaded, else the formula) and checked against its threshold.
+
+    python streaming.py --replay --days 120 --dry-run   # replay cached bars, print signals
+"""
+import abc
+import argparse
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import features
+import scoring
+
+Quote = namedtuple('Quote', 'ticker ts price volume')  # volume = cumulative for the day
+
+MOMENTUM_BARS = 10   # scanner momentum: close vs 9 bars back (hist[-1] vs hist[-10])
+RETURN_WINDOW = 20   # the live return plus the 19 before it (the model's window, see features())
+VOLUME_WINDOW = 20   # volume surge vs the 20 bars before the live one
+MIN_BARS = features.WINDOW + 1  # same warm-up the scanner requires (latest_features)
+RESYNC_EVERY = 1000  # recompute running sums from scratch to shed float drift
+REFRESH_EVERY = 60   # seconds between re-reads of active signals/cooldowns from the DB
+
+
+class RingBuffer:
+    """Fixed-capacity float ring; index -1 is the newest value."""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity)
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+
+    def push(self, value):
+        """Append value; returns the evicted value (or None while filling)."""
+        if self.size < self.capacity:
+            self.data[(self.start + self.size) % self.capacity] = value
+            self.size += 1
+            return None
+        evicted = self.data[self.start]
+        self.data[self.start] = value
+        self.start = (self.start + 1) % self.capacity
+        return evicted
+
+    def __getitem__(self, i):
+        if not -self.size <= i < self.size:
+            raise IndexError(i)
+        if i < 0:
+            i += self.size  # count from the newest value, also while the ring is still filling
+        return self.data[(self.start + i) % self.capacity]
+
+    def set_last(self, value):
+        self.data[(self.start + self.size - 1) % self.capacity] = value
+
+    def values(self):
+        return np.array([self[i] for i in range(self.size)])
+
+    def __len__(self):
+        return self.size
+
+
+def _std(total, total_sq, n):
+    """Sample standard deviation from running sums."""
+    if n < 2:
+        return 0.0
+    return math.sqrt(max((total_sq - total * total / n) / (n - 1), 0.0))
+
+
+class TickerState:
+    """Incremental daily-bar statistics for one ticker."""
+
+    def __init__(self):
+        self.closes = RingBuffer(max(MOMENTUM_BARS, features.MOMENTUM_LAG + 1))
+        self.returns = RingBuffer(RETURN_WINDOW)
+        self.volumes = RingBuffer(VOLUME_WINDOW + 1)  # 20 prior bars + the live one
+        self.ret_sum = self.ret_sumsq = 0.0
+        self.prior_volume = 0.0  # sum of the volumes before the live bar (up to 20)
+        self.day = None
+        self.bars = 0
+        self._updates = 0
+
+    def update(self, quote):
+        day = quote.ts.date() if hasattr(quote.ts, 'date') else quote.ts
+        if day == self.day:
+            self._revise(quote.price, quote.volume)
+        else:
+            self._append(quote.price, quote.volume)
+            self.day = day
+        self._updates += 1
+        if self._updates % RESYNC_EVERY == 0:
+            self._resync()
+
+    def _append(self, close, volume):
+        if len(self.closes):
+            r = close / self.closes[-1] - 1
+            evicted = self.returns.push(r)
+            self.ret_sum += r - (evicted or 0.0)
+            self.ret_sumsq += r * r - (evicted or 0.0) ** 2
+        self.closes.push(close)
+        if len(self.volumes):
+            self.prior_volume += self.volumes[-1]  # yesterday's live bar is now history
+        evicted = self.volumes.push(volume)
+        if evicted is not None:
+            self.prior_volume -= evicted
+        self.bars += 1
+
+    def _revise(self, close, volume):
+        if len(self.closes) > 1:
+            old = self.returns[-1]
+            r = close / self.closes[-2] - 1
+            self.returns.set_last(r)
+            self.ret_sum += r - old
+            self.ret_sumsq += r * r - old * old
+        self.closes.set_last(close)
+        self.volumes.set_last(volume)
+
+    def _resync(self):
+        returns = self.returns.values()
+        self.ret_sum, self.ret_sumsq = returns.sum(), (returns ** 2).sum()
+        self.prior_volume = self.volumes.values()[:-1].sum()
+
+    @property
+    def ready(self):
+        return self.bars >= MIN_BARS
+
+    @property
+    def last(self):
+        return self.closes[-1]
+
+    @property
+    def momentum(self):
+        base = self.closes[-MOMENTUM_BARS]
+        return (self.closes[-1] - base) / base
+
+    def features(self, sentiment, iv_rank=65.0):
+        """One FEATURE_COLUMNS row, as features.latest_features() builds it for the scanner.
+
+        Its volatility covers the 20 closes before the live bar, so the live
+        return is left out.
+        """
+        base = self.closes[-features.MOMENTUM_LAG - 1]
+        newest = self.returns[-1]
+        volatility = _std(self.ret_sum - newest, self.ret_sumsq - newest * newest, len(self.returns) - 1)
+        return np.array([[volatility, (self.closes[-1] - base) / base, self.volume_surge, sentiment, iv_rank]])
+
+    @property
+    def volume_surge(self):
+        n = len(self.volumes) - 1
+        mean = self.prior_volume / n if n else 0.0
+        return self.volumes[-1] / mean if mean > 0 else 1.0
+
+
+# === FEEDS ===
+class QuoteFeed(abc.ABC):
+    """Iterate to receive Quotes; close() to stop. Subclass for live sources."""
+
+    @abc.abstractmethod
+    def __iter__(self):
+        """Yield Quotes until the source ends or close() is called."""
+
+    def close(self):
+        pass
+
+
+class ReplayFeed(QuoteFeed):
+    """Replays a {ticker: OHLCV frame} panel in timestamp order (for testing/backfill).
+
+    speed=0 replays as fast as possible; otherwise sleeps `speed` seconds per bar.
+    """
+
+    def __init__(self, panel, speed=0.0):
+        self.panel = panel
+        self.speed = speed
+        self._closed = False
+
+    @classmethod
+    def from_price_store(cls, tickers, days=120, speed=0.0):
+        import price_store
+        return cls(price_store.get_panel(tickers, days=days), speed)
+
+    def __iter__(self):
+        events = sorted((ts, ticker, bar.Close, bar.Volume)
+                        for ticker, frame in self.panel.items()
+                        for ts, bar in zip(frame.index, frame.itertuples(index=False)))
+        for ts, ticker, close, volume in events:
+            if self._closed:
+                return
+            yield Quote(ticker, ts, float(close), float(volume))
+            if self.speed:
+                time.sleep(self.speed)
+
+    def close(self):
+        self._closed = True
+
+
+# === EVALUATION ===
+class StreamEvaluator:
+    """Keeps a TickerState per ticker and checks the POP threshold on every quote.
+
+    sentiment_fn(ticker) should be cheap (the scanner's is TTL-cached).
+    on_signal(ticker, momentum, sentiment, pop, price, side) fires when a
+    ticker crosses the threshold. With a TickerIndex, tickers with an active
+    signal or in their post-settlement cooldown are skipped, and the index is
+    re-read from the DB every REFRESH_EVERY seconds so settlements done by the
+    periodic scanner re-arm them. Without one, a ticker fires once until
+    reset(ticker) is called.
+    """
+
+    def __init__(self, sentiment_fn, on_signal, threshold=None, model=None, index=None):
+        self.sentiment_fn = sentiment_fn
+        self.on_signal = on_signal
+        self.threshold = scoring.POP_THRESHOLD if threshold is None else threshold
+        self.model = model
+        self.index = index
+        self.states = {}
+        self.fired = set()
+        self._refreshed = time.monotonic()
+
+    def _blocked(self, ticker):
+        if self.index is None:
+            return ticker in self.fired
+        if time.monotonic() - self._refreshed > REFRESH_EVERY:
+            self.index.refresh()
+            self._refreshed = time.monotonic()
+        return self.index.blocked(ticker)
+
+    def on_quote(self, quote):
+        state = self.states.get(quote.ticker)
+        if state is None:
+            state = self.states[quote.ticker] = TickerState()
+        state.update(quote)
+        if not state.ready or self._blocked(quote.ticker):
+            return None
+        momentum = state.momentum
+        sentiment = self.sentiment_fn(quote.ticker)
+        pops, used = scoring.score(self.model, state.features(sentiment), momentum, sentiment)
+        pop = float(np.ravel(pops)[0])
+        if pop > self.threshold:
+            self.fired.add(quote.ticker)
+            self.on_signal(quote.ticker, momentum, sentiment, pop, state.last, str(scoring.sides(momentum, used)))
+        return pop
+
+    def reset(self, ticker):
+        self.fired.discard(ticker)
+
+    def run(self, feed):
+        try:
+            for quote in feed:
+                self.on_quote(quote)
+        finally:
+            feed.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming signal evaluation.")
+    parser.add_argument('--replay', action='store_true', help="replay cached daily bars from prices.db")
+    parser.add_argument('--tickers', nargs='+')
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--speed', type=float, default=0.0, help="seconds between replayed bars")
+    parser.add_argument('--dry-run', action='store_true', help="print signals instead of recording/alerting")
+    args = parser.parse_args(argv)
+    if not args.replay:
+        parser.error("only --replay is available; plug a live QuoteFeed in via StreamEvaluator.run()")
+
+    import scanner
+    tickers = args.tickers or scanner.CORE_TICKERS
+
+    def on_signal(ticker, momentum, sentiment, pop, price, side):
+        if args.dry_run:
+            print(f"{ticker}: {side} pop {pop:.1f} momentum {momentum:+.2%} sentiment {sentiment:+.2f} @ {price:.2f}")
+        else:
+            scanner.emit_signals([(ticker, momentum, sentiment, pop, side)], {ticker: price})
+
+    # Dry runs replay history without recording anything, so they skip the live signal index
+    index = None if args.dry_run else scanner.get_ticker_index()
+    evaluator = StreamEvaluator(scanner.get_sentiment, on_signal, model=scanner.get_model(), index=index)
+    try:
+        evaluator.run(ReplayFeed.from_price_store(tickers, args.days, args.speed))
+    finally:
+        scanner.shutdown()  # deliver queued alerts before exiting
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
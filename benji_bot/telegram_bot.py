@@ -1,18 +1,87 @@
 import asyncio
-from telegram import Bot
+import threading
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-async def send_alert(chat_id, message):
+GLOBAL_RATE = 30          # Telegram allows ~30 messages/sec per bot
+PER_CHAT_INTERVAL = 1.0   # and ~1 message/sec to the same chat
+
+class TelegramSender:
+    """One Bot and one event loop (on a daemon thread) shared by the whole process.
+
+    Messages are sent concurrently but spaced to stay inside Telegram's
+    global and per-chat limits. TELEGRAM_API_URL points the bot at a
+    stand-in server for testing.
+    """
+    def __init__(self, token=None, base_url=None, concurrency=10):
+        self.token = token or os.getenv('TELEGRAM_BOT_TOKEN')
+        self.base_url = base_url or os.getenv('TELEGRAM_API_URL')
+        self.concurrency = concurrency
+        self._bot = None
+        self._bot_lock = asyncio.Lock()  # binds to the sender's loop on first use
+        self._sem = asyncio.Semaphore(concurrency)
+        self._next_global = 0.0
+        self._chat_next = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name='telegram')
+        self._thread.start()
+
+    async def _get_bot(self):
+        # A whole batch is gathered at once; the lock makes the first send build the
+        # Bot while the rest wait for it, instead of each initializing its own
+        async with self._bot_lock:
+            if self._bot is None:
+                from telegram import Bot  # heavy import, only needed once something is sent
+                kwargs = {'base_url': self.base_url} if self.base_url else {}
+                bot = Bot(token=self.token, **kwargs)
+                await bot.initialize()
+                self._bot = bot
+        return self._bot
+
+    async def _throttle(self, chat_id):
+        now = self._loop.time()
+        slot = max(now, self._next_global, self._chat_next.get(chat_id, 0.0))
+        self._next_global = max(self._next_global, now) + 1.0 / GLOBAL_RATE
+        self._chat_next[chat_id] = slot + PER_CHAT_INTERVAL
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _send(self, chat_id, message):
+        bot = await self._get_bot()
+        await self._throttle(chat_id)
+        async with self._sem:
+            await bot.send_message(chat_id=chat_id, text=message)
+
+    async def _send_many(self, messages):
+        return await asyncio.gather(*(self._send(chat_id, text) for chat_id, text in messages), return_exceptions=True)
+
+    def send_many(self, messages, timeout=None):
+        """Send [(chat_id, text), ...]; returns None or the exception for each message."""
+        if not self.token:
+            return [RuntimeError('TELEGRAM_BOT_TOKEN not set')] * len(messages)
+        return asyncio.run_coroutine_threadsafe(self._send_many(messages), self._loop).result(timeout)
+
+    def close(self):
+        if self._bot is not None:
+            asyncio.run_coroutine_threadsafe(self._bot.shutdown(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+_sender = None
+_sender_lock = threading.Lock()
+
+def get_sender():
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = TelegramSender()
+        return _sender
+
+def send_telegram(chat_id, message):
     if not chat_id or not os.getenv('TELEGRAM_BOT_TOKEN'):
         return
     try:
-        bot = Bot(token=os.getenv('TELEGRAM_BOT_TOKEN'))
-        await bot.send_message(chat_id=chat_id, text=message)
+        get_sender().send_many([(chat_id, message)], timeout=30)
     except:
         pass
-
-def send_telegram(chat_id, message):
-    asyncio.run(send_alert(chat_id, message))
@@ -0,0 +1,54 @@
+"""features.py must reproduce the original per-row loop from train_model.py exactly."""
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from features import FEATURE_COLUMNS, build_features
+
+
+def _panel(seed=0, tickers=('AAA', 'BBB', 'CCC'), bars=90):
+    rng = np.random.RandomState(seed)
+    dates = pd.bdate_range('2024-01-02', periods=bars)
+    panel = {}
+    for ticker in tickers:
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.02, bars))
+        volume = rng.randint(1_000_000, 5_000_000, bars).astype(float)
+        volume[rng.rand(bars) < 0.05] = 0.0  # zero-volume days exercise the surge fallback
+        panel[ticker] = pd.DataFrame({'Close': close, 'Volume': volume}, index=dates)
+    return panel
+
+
+def _legacy(panel, tickers, random_state):
+    """The pre-vectorization loop, verbatim apart from positional .iloc access."""
+    features, labels = [], []
+    for ticker in tickers:
+        hist = panel[ticker]
+        close, volume = hist['Close'], hist['Volume']
+        for i in range(20, len(hist) - 5):
+            volatility = close.iloc[i - 20:i].pct_change().std()
+            momentum = (close.iloc[i] - close.iloc[i - 10]) / close.iloc[i - 10]
+            volume_surge = volume.iloc[i] / volume.iloc[i - 20:i].mean() if volume.iloc[i - 20:i].mean() > 0 else 1
+            price_change_5d = (close.iloc[i + 5] - close.iloc[i]) / close.iloc[i]
+            features.append([volatility, momentum, volume_surge,
+                             random_state.uniform(0.3, 0.9), random_state.uniform(40, 90)])
+            labels.append(1 if price_change_5d > 0.03 else 0)
+    return np.array(features), np.array(labels)
+
+
+def test_build_features_matches_legacy_loop():
+    panel = _panel()
+    tickers = sorted(panel)
+    X, y = build_features(panel, tickers, np.random.RandomState(7))
+    X_old, y_old = _legacy(panel, tickers, np.random.RandomState(7))
+    assert X.shape == (len(X_old), len(FEATURE_COLUMNS))
+    np.testing.assert_array_equal(X, X_old)
+    np.testing.assert_array_equal(y, y_old)
+
+
+def test_build_features_skips_missing_tickers():
+    panel = _panel(tickers=('AAA',))
+    X, y = build_features(panel, ['AAA', 'ZZZ'], np.random.RandomState(1))
+    X_old, y_old = _legacy(panel, ['AAA'], np.random.RandomState(1))
+    np.testing.assert_array_equal(X, X_old)
+    np.testing.assert_array_equal(y, y_old)
@@ -0,0 +1,42 @@
+"""ForestArtifact must score like the RandomForestClassifier it was built from."""
+import pytest
+
+np = pytest.importorskip('numpy')
+ensemble = pytest.importorskip('sklearn.ensemble')
+
+import model_artifact
+from features import FEATURE_COLUMNS
+
+
+@pytest.fixture(scope='module')
+def forest():
+    rng = np.random.RandomState(42)
+    X = rng.normal(size=(600, len(FEATURE_COLUMNS)))
+    y = (X[:, 1] + 0.5 * X[:, 3] + rng.normal(0, 0.5, len(X)) > 0.3).astype(int)
+    model = ensemble.RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0)
+    model.fit(X, y)
+    return model, rng.normal(size=(400, len(FEATURE_COLUMNS)))
+
+
+def test_predict_proba_matches_sklearn(forest):
+    model, X = forest
+    artifact = model_artifact.ForestArtifact.from_sklearn(model, feature_columns=FEATURE_COLUMNS)
+    np.testing.assert_array_equal(artifact.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(artifact.predict(X), model.predict(X))
+
+
+def test_saved_artifact_loads_memory_mapped(forest, tmp_path):
+    model, X = forest
+    path = str(tmp_path / 'model')
+    model_artifact.save(model, path, feature_columns=FEATURE_COLUMNS)
+    artifact = model_artifact.load(path, FEATURE_COLUMNS)
+    assert isinstance(artifact.value, np.memmap)
+    np.testing.assert_array_equal(artifact.predict_proba(X), model.predict_proba(X))
+
+
+def test_load_rejects_other_feature_schema(forest, tmp_path):
+    model, _ = forest
+    path = str(tmp_path / 'model')
+    model_artifact.save(model, path, feature_columns=FEATURE_COLUMNS)
+    with pytest.raises(ValueError):
+        model_artifact.load(path, FEATURE_COLUMNS[::-1])
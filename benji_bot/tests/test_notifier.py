@@ -0,0 +1,56 @@
+"""Retry policy: skip unconfigured channels, retry only transient errors, don't lose retries on stop."""
+import concurrent.futures
+import time
+
+from notifier import Notifier
+
+SMTP = {'host': None, 'port': 587, 'user': None, 'password': None, 'sender': None, 'starttls': False}
+
+
+class FakeTelegram:
+    """Each send_many() takes the next result: an exception to raise, or one error (or None) for every message."""
+
+    def __init__(self, *results, token='t'):
+        self.token = token
+        self.results = list(results)
+        self.calls = 0
+
+    def send_many(self, messages, timeout=None):
+        self.calls += 1
+        result = self.results.pop(0) if self.results else [None]
+        if isinstance(result, BaseException):
+            raise result
+        return result * len(messages)
+
+
+def test_unconfigured_channels_are_skipped():
+    notifier = Notifier(telegram=FakeTelegram(token=None), smtp=SMTP).start()
+    notifier.email('a@example.com', 'subject', 'body')
+    notifier.telegram_message('1', 'text')
+    notifier.stop()
+    stats = notifier.stats()
+    assert stats['email_skipped'] == stats['telegram_skipped'] == 1
+    assert 'email_retried' not in stats and 'telegram_failed' not in stats
+
+
+def test_permanent_errors_and_timeouts_are_not_retried():
+    for result in ([RuntimeError('bad chat')], concurrent.futures.TimeoutError()):
+        telegram = FakeTelegram(*[result] * 4)
+        notifier = Notifier(telegram=telegram, smtp=SMTP, backoff=0.01).start()
+        notifier.telegram_message('1', 'text')
+        assert notifier.flush(5)
+        notifier.stop()
+        assert telegram.calls == 1
+        assert notifier.stats()['telegram_failed'] == 1
+
+
+def test_stop_retries_pending_messages_immediately():
+    telegram = FakeTelegram([ConnectionResetError()])
+    notifier = Notifier(telegram=telegram, smtp=SMTP, backoff=60).start()
+    notifier.telegram_message('1', 'text')
+    while not notifier.stats().get('telegram_retried'):
+        time.sleep(0.01)
+    notifier.stop(timeout=1)
+    stats = notifier.stats()
+    assert telegram.calls == 2
+    assert stats['telegram_sent'] == 1 and stats['pending'] == 0 and stats['dropped'] == 0
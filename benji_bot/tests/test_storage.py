@@ -0,0 +1,29 @@
+"""Schema migrations must be safe when several processes open the database at once."""
+import threading
+
+import storage
+
+
+def test_concurrent_open_migrates_once(tmp_path):
+    for trial in range(20):
+        path = str(tmp_path / f'benji-{trial}.db')
+        start, errors, writers = threading.Barrier(3), [], []
+
+        def open_writer():
+            start.wait()
+            try:
+                writers.append(storage.Writer(path))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=open_writer) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for writer in writers:
+            writer.close()
+        assert errors == []
+        conn = storage.connect(path)
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == storage.MIGRATIONS[-1][0]
+        conn.close()
@@ -0,0 +1,32 @@
+"""streaming.TickerState must build the same feature row as features.latest_features, live bar and all."""
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+import features
+from streaming import MIN_BARS, Quote, TickerState
+
+
+def test_features_match_latest_features_through_intraday_revisions():
+    rng = np.random.RandomState(3)
+    days = pd.bdate_range('2024-01-02', periods=70)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, len(days)))
+    volumes = rng.randint(1_000_000, 5_000_000, len(days)).astype(float)
+    volumes[rng.rand(len(days)) < 0.05] = 0.0  # zero-volume days exercise the surge fallback
+    state = TickerState()
+    checked = 0
+    for i, day in enumerate(days):
+        # two intraday revisions of the live bar, then its close
+        for fraction in (0.3, 0.7, 1.0):
+            price = closes[i - 1] + fraction * (closes[i] - closes[i - 1]) if i else closes[i]
+            volume = fraction * volumes[i]
+            state.update(Quote('AAA', day + pd.Timedelta(hours=10 + 6 * fraction), price, volume))
+            if not state.ready:
+                continue
+            history = pd.DataFrame({'Close': np.append(closes[:i], price), 'Volume': np.append(volumes[:i], volume)},
+                                   index=days[:i + 1])
+            _, expected = features.latest_features({'AAA': history}, {'AAA': 0.6})
+            np.testing.assert_allclose(state.features(0.6), expected, rtol=1e-9, atol=1e-12)
+            checked += 1
+    assert checked == 3 * (len(days) - MIN_BARS + 1)
@@ -0,0 +1,158 @@
+"""Per-ticker scan state: last evaluation, last score, cooldowns and adaptive re-evaluation.
+
+The index lives in memory for the scanner's lifetime and is persisted to
+the ticker_state table in one batched upsert per pass, so a restart keeps
+every ticker's schedule. Before the expensive pipeline (sentiment, option
+chains, scoring) runs, due() drops tickers that:
+
+- already have an active signal;
+- are cooling down after their last signal settled (COOLDOWN);
+- scored far below the threshold recently, until their re-evaluation
+  interval (doubling while they stay cold, up to MAX_INTERVAL) is up.
+
+A ticker whose close moved MOVE_TRIGGER since its last evaluation is due
+immediately, so cold names that start moving are still picked up on the
+next pass. Tickers within HOT_GAP of the threshold are due again after
+HOT_INTERVAL, shorter than a regular pass: next_due() tells the scheduler
+(scanner_service.py) when the earliest one is, so it can run a short pass
+over just those tickers.
+"""
+import threading
+import time
+
+import storage
+
+HOT_GAP = 10.0          # POP points below the threshold that still count as hot
+HOT_INTERVAL = 180.0    # hot tickers are re-evaluated this often (a third of a regular pass)
+BASE_INTERVAL = 1080.0  # first back-off for a cold ticker (two 9-minute passes)
+MAX_INTERVAL = 3600.0   # coldest tickers are still looked at hourly
+MOVE_TRIGGER = 0.02     # |close change| since last evaluation that makes a ticker due now
+COOLDOWN = 86400.0      # after a signal settles, before the ticker may fire again
+
+_COLUMNS = ('ticker', 'last_eval', 'last_pop', 'last_close', 'interval', 'next_eval', 'cooldown_until')
+
+
+class TickerIndex:
+    def __init__(self, rows=(), active=()):
+        self._state = {row[0]: dict(zip(_COLUMNS, row)) for row in rows}
+        self._active = set(active)
+        self._dirty = set()
+        self._watched = set()  # tickers from the last due() call
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        """Index from ticker_state plus the current active_signals (read once, at startup)."""
+        db = storage.reader()
+        rows = db.execute(f"SELECT {', '.join(_COLUMNS)} FROM ticker_state").fetchall()
+        return cls(rows, (row[0] for row in db.execute('SELECT ticker FROM active_signals')))
+
+    def _entry(self, ticker):
+        entry = self._state.get(ticker)
+        if entry is None:
+            entry = self._state[ticker] = dict.fromkeys(_COLUMNS)
+            entry.update(ticker=ticker, interval=0.0, next_eval=0.0, cooldown_until=0.0)
+        return entry
+
+    # --- scheduling ---
+    def due(self, tickers, closes=None, now=None):
+        """The subset of tickers worth evaluating this pass, sorted."""
+        now = now or time.time()
+        closes = closes or {}
+        due = []
+        with self._lock:
+            self._watched = set(tickers)
+            for ticker in sorted(self._watched):
+                if ticker in self._active:
+                    continue
+                entry = self._state.get(ticker)
+                if entry is None:
+                    due.append(ticker)
+                    continue
+                if (entry['cooldown_until'] or 0) > now:
+                    continue
+                close, last = closes.get(ticker), entry['last_close']
+                moved = close is not None and last and abs(close / last - 1) >= MOVE_TRIGGER
+                if moved or (entry['next_eval'] or 0) <= now:
+                    due.append(ticker)
+        return due
+
+    def next_due(self, now=None):
+        """Seconds until the earliest watched ticker is due again (<= 0: overdue), or None if none is scheduled."""
+        now = now or time.time()
+        with self._lock:
+            pending = [e['next_eval'] for t, e in self._state.items()
+                       if t in self._watched and t not in self._active
+                       and (e['cooldown_until'] or 0) <= now and e['next_eval']]
+        return min(pending) - now if pending else None
+
+    def record(self, scores, closes, threshold, now=None):
+        """Store this pass's POP per evaluated ticker and schedule its next evaluation."""
+        now = now or time.time()
+        with self._lock:
+            for ticker, pop in scores.items():
+                entry = self._entry(ticker)
+                if threshold - pop <= HOT_GAP:
+                    interval = HOT_INTERVAL
+                else:
+                    interval = min(MAX_INTERVAL, max(BASE_INTERVAL, 2 * (entry['interval'] or 0)))
+                entry.update(last_eval=now, last_pop=float(pop), last_close=closes.get(ticker, entry['last_close']),
+                             interval=interval, next_eval=now + interval)
+                self._dirty.add(ticker)
+
+    # --- signal lifecycle ---
+    def is_active(self, ticker):
+        with self._lock:
+            return ticker in self._active
+
+    def blocked(self, ticker, now=None):
+        """Active signal or cooling down: the ticker must not fire."""
+        now = now or time.time()
+        with self._lock:
+            entry = self._state.get(ticker)
+            return ticker in self._active or (entry is not None and (entry['cooldown_until'] or 0) > now)
+
+    def refresh(self):
+        """Re-read active signals and cooldowns another process (the periodic scanner) may have changed."""
+        db = storage.reader()
+        active = {row[0] for row in db.execute('SELECT ticker FROM active_signals')}
+        cooling = db.execute('SELECT ticker, cooldown_until FROM ticker_state WHERE cooldown_until > ?', (time.time(),)).fetchall()
+        with self._lock:
+            self._active = active
+            for ticker, until in cooling:
+                entry = self._entry(ticker)
+                entry['cooldown_until'] = max(entry['cooldown_until'] or 0, until)
+
+    def mark_signaled(self, tickers):
+        with self._lock:
+            self._active.update(tickers)
+
+    def release(self, tickers, now=None):
+        """Signals for tickers settled: start their cooldown."""
+        now = now or time.time()
+        with self._lock:
+            for ticker in tickers:
+                self._active.discard(ticker)
+                self._entry(ticker)['cooldown_until'] = now + COOLDOWN
+                self._dirty.add(ticker)
+
+    # --- persistence ---
+    def flush(self):
+        """Persist every changed ticker in one batched upsert."""
+        with self._lock:
+            rows = [tuple(self._state[t][c] for c in _COLUMNS) for t in sorted(self._dirty)]
+            self._dirty.clear()
+        if rows:
+            storage.writer().executemany(
+                f"INSERT OR REPLACE INTO ticker_state ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", rows).result()
+        return len(rows)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                'tracked': len(self._state),
+                'active': len(self._active),
+                'cooling': sum((e['cooldown_until'] or 0) > now for e in self._state.values()),
+                'backed_off': sum((e['next_eval'] or 0) > now for e in self._state.values()),
+            }
@@ -1,49 +1,130 @@
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 from datetime import datetime, timedelta
+import argparse
+import os
 import pickle
+import zlib
+import numpy as np
+import model_artifact
+import price_store
+from features import build_features, FEATURE_COLUMNS
 
 CORE_TICKERS = ['NVDA', 'TSLA', 'AMD', 'SMCI', 'META', 'AAPL', 'MSFT', 'GOOGL', 'AVGO']
+CACHE_DIR = 'feature_cache'
+CACHE_VERSION = 1  # bump when features.py changes what it produces
 
-def fetch_historical_data():
+def fetch_historical_data(tickers=CORE_TICKERS, days=730):
     end = datetime.now()
-    start = end - timedelta(days=730)
-    features = []
-    labels = []
-    
-    for ticker in CORE_TICKERS:
-        print(f"Fetching {ticker}...")
-        try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(start=start, end=end)
-            
-            for i in range(20, len(hist)-5):
-                volatility = hist['Close'][i-20:i].pct_change().std()
-                momentum = (hist['Close'][i] - hist['Close'][i-10]) / hist['Close'][i-10]
-                volume_surge = hist['Volume'][i] / hist['Volume'][i-20:i].mean() if hist['Volume'][i-20:i].mean() > 0 else 1
-                price_change_5d = (hist['Close'][i+5] - hist['Close'][i]) / hist['Close'][i]
-                
-                features.append([
-                    volatility,
-                    momentum,
-                    volume_surge,
-                    np.random.uniform(0.3, 0.9),  # mock sentiment
-                    np.random.uniform(40, 90)     # mock IV rank
-                ])
-                labels.append(1 if price_change_5d > 0.03 else 0)
-        except:
+    print(f"Fetching {len(tickers)} tickers...")
+    price_store.update(tickers, days=days)
+    panel = price_store.get_panel(tickers, days=days, end=end.date().isoformat())
+    return build_features(panel, tickers)
+
+# === FEATURE CACHE ===
+def _cache_path(cache_dir, ticker):
+    return os.path.join(cache_dir, f"{ticker}.npz")
+
+def _load_cached(cache_dir, ticker, days, last_date):
+    """Cached (X, y) for a ticker, or None if missing or built from older bars."""
+    try:
+        with np.load(_cache_path(cache_dir, ticker)) as data:
+            if (int(data['version']) == CACHE_VERSION and int(data['days']) == days
+                    and str(data['last_date']) == last_date):
+                return data['X'], data['y']
+    except (OSError, KeyError, ValueError):
+        pass
+    return None
+
+def build_feature_matrix(tickers=CORE_TICKERS, days=730, cache_dir=CACHE_DIR, download=True):
+    """Feature matrix for all tickers, rebuilding only tickers with new bars.
+
+    Returns (X, y, rebuilt) where rebuilt lists the tickers that were stale.
+    Mock columns are drawn from a per-ticker seeded RNG so a cached ticker and
+    a rebuilt one are interchangeable.
+    """
+    if download:
+        print(f"Updating bars for {len(tickers)} tickers...")
+        price_store.update(tickers, days=days)
+    os.makedirs(cache_dir, exist_ok=True)
+    last = price_store.last_dates(tickers)
+
+    parts, stale = {}, []
+    for ticker in tickers:
+        if ticker not in last:
             continue
-    
-    return np.array(features), np.array(labels)
+        cached = _load_cached(cache_dir, ticker, days, last[ticker])
+        if cached is None:
+            stale.append(ticker)
+        else:
+            parts[ticker] = cached
+
+    if stale:
+        print(f"Rebuilding features for {len(stale)} stale tickers...")
+        panel = price_store.get_panel(stale, days=days, end=datetime.now().date().isoformat())
+        for ticker in stale:
+            X, y = build_features(panel, [ticker], np.random.RandomState(zlib.crc32(ticker.encode())))
+            np.savez(_cache_path(cache_dir, ticker), X=X, y=y, version=CACHE_VERSION, days=days, last_date=last[ticker])
+            parts[ticker] = (X, y)
+
+    ordered = [parts[t] for t in tickers if t in parts]
+    if not ordered:
+        return np.empty((0, len(FEATURE_COLUMNS))), np.empty(0, dtype=np.int64), stale
+    return np.concatenate([p[0] for p in ordered]), np.concatenate([p[1] for p in ordered]), stale
+
+# === TRAINING ===
+def load_model(path):
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+def train(X, y, trees=100, n_jobs=-1, warm_start_from=None, add_trees=0):
+    """Fit a fresh forest, or grow warm_start_from by add_trees on the current data."""
+    if warm_start_from is not None and add_trees > 0:
+        model = warm_start_from
+        model.set_params(warm_start=True, n_jobs=n_jobs, n_estimators=model.n_estimators + add_trees)
+    else:
+        from sklearn.ensemble import RandomForestClassifier  # slow import; --help and cache checks don't need it
+        model = RandomForestClassifier(n_estimators=trees, max_depth=10, random_state=42, n_jobs=n_jobs)
+    model.fit(X, y)
+    return model
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the Benji RandomForest model.")
+    parser.add_argument('--tickers', nargs='+', default=CORE_TICKERS)
+    parser.add_argument('--days', type=int, default=730, help="history window in calendar days")
+    parser.add_argument('--trees', type=int, default=100, help="trees for a full refit")
+    parser.add_argument('--warm-start', type=int, default=0, metavar='N',
+                        help="add N trees to the existing model instead of refitting")
+    parser.add_argument('--jobs', type=int, default=-1, help="cores to train on (-1 = all)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--output', default='model.pkl', help="pickled forest (kept for --warm-start)")
+    parser.add_argument('--artifact', default=model_artifact.DEFAULT_PATH, help="flat-array model the scanner loads")
+    parser.add_argument('--offline', action='store_true', help="use cached bars only, no download")
+    parser.add_argument('--force', action='store_true', help="retrain even if no ticker had new data")
+    args = parser.parse_args(argv)
+
+    X, y, stale = build_feature_matrix(args.tickers, args.days, args.cache_dir, download=not args.offline)
+    if not len(X):
+        print("No training data available.")
+        return 1
+
+    existing = load_model(args.output) if args.warm_start else None
+    if existing is not None and not stale and not args.force:
+        print("No new data since the last run; model left unchanged.")
+        return 0
 
-print("Training RandomForest model...")
-X, y = fetch_historical_data()
-model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
-model.fit(X, y)
+    print("Training RandomForest model...")
+    model = train(X, y, args.trees, args.jobs, existing, args.warm_start)
+    with open(args.output, 'wb') as f:
+        pickle.dump(model, f)
+    last = price_store.last_dates(args.tickers)
+    model_artifact.save(model, args.artifact, feature_columns=FEATURE_COLUMNS, tickers=sorted(last),
+                        days=args.days, data_start=(datetime.now().date() - timedelta(days=args.days)).isoformat(),
+                        data_end=max(last.values()), samples=int(len(X)), positive_rate=float(y.mean()))
 
-with open('model.pkl', 'wb') as f:
-    pickle.dump(model, f)
+    print(f"Model trained on {len(X)} samples ({model.n_estimators} trees). Saved to {args.output} and {args.artifact}/")
+    return 0
 
-print(f"Model trained on {len(X)} samples. Saved to model.pkl")
+if __name__ == '__main__':
+    raise SystemExit(main())
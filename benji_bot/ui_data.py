@@ -0,0 +1,120 @@
+"""Read-side data access for the Streamlit UI.
+
+Every query here is cached with a short TTL so reruns don't hit SQLite, and
+nothing here calls out to the network. Writes from the UI call
+invalidate() so the user sees their own change immediately.
+"""
+import json
+from datetime import datetime
+
+import streamlit as st
+
+import storage
+
+PAGE_SIZE = 20
+
+# user_confirmed: this user's ledger entry, or the legacy global flag for plays confirmed before the ledger
+_SIGNAL_COLUMNS = ('s.id, s.timestamp, s.ticker, s.direction, s.strike, s.expiry, s.pnl, '
+                   '(c.signal_id IS NOT NULL OR s.user_confirmed) AS user_confirmed, s.pop, s.explanation, s.sentiment')
+_SIGNALS = 'signals s LEFT JOIN confirmations c ON c.username = ? AND c.signal_id = s.id'
+_AI_ALL = "SELECT pnl FROM pnl_rollups WHERE scope = 'ai' AND key = '' AND period = 'all' AND bucket = ''"
+
+
+def _rows(sql, params=()):
+    cur = storage.reader().execute(sql, params)
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+@st.cache_data(ttl=15, show_spinner=False)
+def latest_signal():
+    """Newest active signal (with its sentiment snapshot), or None."""
+    rows = _rows('SELECT ticker, direction, strike, expiry, entry_time, pop, explanation, sentiment '
+                 'FROM active_signals ORDER BY entry_time DESC LIMIT 1')
+    return rows[0] if rows else None
+
+
+@st.cache_data(ttl=15, show_spinner=False)
+def user_totals(username):
+    """(ai_total, you_total) in one query: AI is the global rollup minus its value when the user joined."""
+    row = storage.reader().execute(f'SELECT COALESCE(({_AI_ALL}), 0) - COALESCE(ai_base, 0), you_total FROM users WHERE username=?',
+                                   (username,)).fetchone()
+    return (row[0] or 0, row[1] or 0) if row else (0, 0)
+
+
+def _buckets(now=None):
+    now = now or datetime.now()
+    year, week, _ = now.isocalendar()  # same buckets as storage.iso_week()
+    return {'day': now.date().isoformat(), 'week': f'{year}-W{week:02d}', 'all': ''}
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def rollup_stats(scope, key):
+    """{period: {'plays', 'wins', 'pnl'}} for today, this week and all time (primary-key lookups).
+
+    scope is 'ai' (key ''), 'ticker' or 'user'.
+    """
+    buckets = _buckets()
+    rows = _rows('SELECT period, plays, wins, pnl FROM pnl_rollups WHERE scope = ? AND key = ? AND '
+                 "((period = 'day' AND bucket = ?) OR (period = 'week' AND bucket = ?) OR (period = 'all' AND bucket = ''))",
+                 (scope, key, buckets['day'], buckets['week']))
+    stats = {period: {'plays': 0, 'wins': 0, 'pnl': 0.0} for period in buckets}
+    for row in rows:
+        stats[row.pop('period')] = row
+    return stats
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def leaderboard(period='week', limit=10):
+    """Top users by confirmed P&L for the current day/week (or all time), from the rollups index."""
+    return _rows("SELECT key AS username, plays, wins, pnl FROM pnl_rollups WHERE scope = 'user' AND period = ? AND bucket = ? "
+                 'ORDER BY pnl DESC LIMIT ?', (period, _buckets()[period], limit))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def signals_page(username, before=None, page_size=PAGE_SIZE):
+    """One page of past signals, newest first, using keyset pagination.
+
+    `before` is the (timestamp, id) of the last row on the previous page.
+    user_confirmed reflects username's own ledger. Returns (rows,
+    next_cursor); next_cursor is None on the last page.
+    """
+    if before is None:
+        rows = _rows(f'SELECT {_SIGNAL_COLUMNS} FROM {_SIGNALS} ORDER BY s.timestamp DESC, s.id DESC LIMIT ?',
+                     (username, page_size + 1))
+    else:
+        rows = _rows(f'SELECT {_SIGNAL_COLUMNS} FROM {_SIGNALS} WHERE (s.timestamp, s.id) < (?, ?) '
+                     'ORDER BY s.timestamp DESC, s.id DESC LIMIT ?', (username, *before, page_size + 1))
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, (rows[-1]['timestamp'], rows[-1]['id'])
+    return rows, None
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def scan_report(last=20):
+    """Timings of the last `last` scans for the admin panel.
+
+    Returns (runs, phases, tickers): runs newest first; phases and tickers
+    as [(name, mean seconds, max seconds)], slowest first.
+    """
+    runs = _rows('SELECT started, duration, scanned, signals, errors, phases, slowest FROM scan_runs '
+                 'ORDER BY id DESC LIMIT ?', (last,))
+    phases, tickers = {}, {}
+    for run in runs:
+        run['phases'] = json.loads(run['phases'] or '{}')
+        run['slowest'] = json.loads(run['slowest'] or '[]')
+        for name, seconds in run['phases'].items():
+            phases.setdefault(name, []).append(seconds)
+        for ticker, seconds in run['slowest']:
+            tickers.setdefault(ticker, []).append(seconds)
+    summarize = lambda d: sorted(((k, sum(v) / len(v), max(v)) for k, v in d.items()), key=lambda r: r[1], reverse=True)
+    return runs, summarize(phases), summarize(tickers)
+
+
+def invalidate():
+    latest_signal.clear()
+    user_totals.clear()
+    signals_page.clear()
+    rollup_stats.clear()
+    leaderboard.clear()
@@ -0,0 +1,105 @@
+"""Batch VADER scoring with text-level memoization.
+
+Texts are deduplicated per batch and compound scores are memoized by text
+hash in a bounded LRU, so repeated posts (and the per-ticker fallback text)
+are scored once. Batches with many uncached texts are spread over a
+process pool, since VADER is pure Python and holds the GIL.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+
+_worker_vader = None
+
+
+def _init_worker():
+    global _worker_vader
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    _worker_vader = SentimentIntensityAnalyzer()
+
+
+def _score_chunk(texts):
+    return [_worker_vader.polarity_scores(text)['compound'] for text in texts]
+
+
+def _key(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class VaderService:
+    def __init__(self, max_entries=100_000, process_threshold=2000, processes=None, chunk_size=500):
+        self.max_entries = max_entries
+        self.process_threshold = process_threshold  # uncached texts before we go multi-process
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        self._vader = None  # lexicon is loaded on first uncached text
+        self._memo = OrderedDict()  # text hash -> compound
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def score(self, texts):
+        """Compound score for every text, in input order."""
+        keys = [_key(text) for text in texts]
+        scores, todo = {}, {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in scores or key in todo:
+                    continue
+                cached = self._memo.get(key)
+                if cached is None:
+                    todo[key] = text
+                else:
+                    self._memo.move_to_end(key)
+                    scores[key] = cached
+            self.hits += len(scores)
+            self.misses += len(todo)
+
+        if todo:
+            with metrics.span('cpu.vader'):
+                fresh = dict(zip(todo, self._score_uncached(list(todo.values()))))
+            scores.update(fresh)
+            with self._lock:
+                self._memo.update(fresh)
+                while len(self._memo) > self.max_entries:
+                    self._memo.popitem(last=False)
+        return [scores[key] for key in keys]
+
+    def score_one(self, text):
+        return self.score([text])[0]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._memo), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def _analyzer(self):
+        with self._pool_lock:
+            if self._vader is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                self._vader = SentimentIntensityAnalyzer()
+            return self._vader
+
+    def _score_uncached(self, texts):
+        if len(texts) < self.process_threshold or self.processes < 2:
+            vader = self._analyzer()
+            return [vader.polarity_scores(text)['compound'] for text in texts]
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn, not fork: the scanner has live threads (DB writer, notifier, fetch pools)
+                self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        return [score for chunk in self._pool.map(_score_chunk, chunks) for score in chunk]